@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Clip render benchmark: per-clip ffmpeg processes vs one single-pass ffmpeg
+Renders synthetic moments for 5, 10 and 15 clips with each mode and prints
+wall times as JSON. Needs ffmpeg on PATH; no demo or cs2json required.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import synthetic_moments
+from generate_clips import ClipGenerator
+
+
+class SyntheticClipGenerator(ClipGenerator):
+    def __init__(self, moments, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.moments = moments
+
+    def get_suspicious_moments(self):
+        return self.moments
+
+
+def run(count, render_mode, workers):
+    with tempfile.TemporaryDirectory() as out:
+        generator = SyntheticClipGenerator(
+            synthetic_moments(count), "synthetic.dem", out, "bench",
+            sensitivity=5, workers=workers, render_mode=render_mode,
+        )
+        started = time.perf_counter()
+        clips = generator.generate_clips(count)
+        return {
+            "clips": count,
+            "renderMode": render_mode,
+            "workers": generator.workers,
+            "rendered": len(clips),
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+
+
+def main():
+    counts = [int(c) for c in sys.argv[1:]] or [5, 10, 15]
+    results = []
+    for count in counts:
+        results.append(run(count, "per_clip", 1))
+        results.append(run(count, "per_clip", None))
+        results.append(run(count, "single_pass", 1))
+    print(json.dumps({"benchmark": "clip_render", "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Synthetic fixtures for the offline benchmarks
+Deterministic cs2json DemoSummary documents, minimal but well-formed
+PBDEMS2 demo files (they pass demo_preflight) and the deploy-style script tree
+the stub cs2json / ffmpeg executables run in.
+"""
+
+import glob
+import json
+import os
+import random
+import shutil
+import stat
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+TYPES = ["damage_burst", "aim_lock", "reaction_time", "unusual_accuracy", "impossible_angle"]
+WEAPONS = ["ak47", "m4a1", "awp", "deagle", "usp_silencer", "glock"]
+
+
+def synthetic_moments(count, players=10, seed=None):
+    rnd = random.Random(seed)
+    return [
+        {
+            "playerName": f"player{i % max(1, players)}",
+            "team": "Terrorists" if i % 2 else "Counter-Terrorists",
+            "suspicionType": TYPES[i % len(TYPES)],
+            "description": f"Synthetic moment {i}",
+            "confidence": round(rnd.uniform(0.5, 0.99), 3) if seed is not None else 0.95 - i * 0.01,
+            "tick_start": i * 640,
+            "tick_end": i * 640 + 320,
+            "estimatedDuration": 3,
+        }
+        for i in range(count)
+    ]
+
+
+def synthetic_players(count, rnd):
+    players = []
+    for i in range(count):
+        kills = rnd.randint(0, 40)
+        deaths = rnd.randint(0, 25)
+        headshots = rnd.randint(0, kills)
+        damage = rnd.randint(kills * 60, kills * 120 + 200)
+        players.append({
+            "name": f"player{i}",
+            "steamId": 76561198000000000 + i,
+            "team": "Counter-Terrorists" if i % 2 else "Terrorists",
+            "kills": kills,
+            "deaths": deaths,
+            "assists": rnd.randint(0, 10),
+            "headshots": headshots,
+            "damage": damage,
+            "damageTaken": rnd.randint(500, 3000),
+            "utility": ["smokegrenade", "flashbang"][: rnd.randint(0, 2)],
+            "plants": rnd.randint(0, 3),
+            "defuses": rnd.randint(0, 2),
+            "weapons": {w: rnd.randint(1, 10) for w in rnd.sample(WEAPONS, 3)},
+            "accuracy": round(rnd.uniform(0.1, 0.7), 4),
+            "hsPercent": round(headshots / kills * 100, 2) if kills else 0,
+            "kdRatio": round(kills / deaths, 2) if deaths else float(kills),
+            "rating": round(rnd.uniform(0.5, 2.0), 2),
+        })
+    return players
+
+
+def synthetic_summary(players, moments, seed=0):
+    """A cs2json DemoSummary with the given number of players and suspicious moments"""
+    rnd = random.Random(seed * 1000 + players * 7 + moments)
+    roster = synthetic_players(players, rnd)
+    return {
+        "success": True,
+        "map": "de_mirage",
+        "gameMode": "5v5" if players > 8 else "wingman" if players <= 4 else "deathmatch",
+        "teamAName": "Counter-Terrorists",
+        "teamBName": "Terrorists",
+        "teamAScore": 13,
+        "teamBScore": rnd.randint(0, 11),
+        "duration": 24 * 115 * 64,
+        "rounds": 24,
+        "players": roster,
+        "totalKills": sum(p["kills"] for p in roster),
+        "suspiciousMoments": synthetic_moments(moments, players, seed=rnd.randint(0, 1 << 30)),
+    }
+
+
+def varint(n):
+    out = bytearray()
+    while True:
+        byte = n & 0x7F
+        n >>= 7
+        if n:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def write_demo(path, frames=256, payload=4096, seed=0):
+    """A PBDEMS2 file with valid framing and random payloads"""
+    rnd = random.Random(seed)
+    body = bytearray()
+    for i in range(frames):
+        data = rnd.randbytes(payload) if hasattr(rnd, "randbytes") else os.urandom(payload)
+        body += varint(1 if i == 0 else 7) + varint(i) + varint(len(data)) + data
+    body += varint(0) + varint(frames) + varint(0)
+    fileinfo = 16 + len(body)
+    body += varint(2) + varint(frames) + varint(4) + b"\0" * 4
+    with open(path, "wb") as f:
+        f.write(b"PBDEMS2\0" + fileinfo.to_bytes(4, "little") + bytes(4) + body)
+
+
+def install_tree(root, real_ffmpeg=False):
+    """Deploy layout under `root`: scripts/*.py + stub cs2json, demos/, bin/ffmpeg"""
+    scripts = os.path.join(root, "scripts")
+    os.makedirs(scripts, exist_ok=True)
+    os.makedirs(os.path.join(root, "demos"), exist_ok=True)
+    for path in glob.glob(os.path.join(REPO_DIR, "*.py")):
+        if not path.endswith("_test.py"):
+            shutil.copy(path, scripts)
+
+    def install(src, dst):
+        shutil.copy(os.path.join(BENCH_DIR, src), dst)
+        os.chmod(dst, os.stat(dst).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+    install("stub_cs2json.py", os.path.join(scripts, "cs2json"))
+    if not real_ffmpeg:
+        os.makedirs(os.path.join(root, "bin"), exist_ok=True)
+        install("stub_ffmpeg.py", os.path.join(root, "bin", "ffmpeg"))
+    return scripts
+
+
+def write_case(root, players, moments, seed=0):
+    """Demo + cs2json fixture for one benchmark case; returns the demo path"""
+    demo = os.path.join(root, "demos", f"p{players}_m{moments}.dem")
+    write_demo(demo, seed=players * 1000 + moments)
+    with open(f"{demo}.fixture.json", "w") as f:
+        json.dump(synthetic_summary(players, moments, seed), f)
+    return demo
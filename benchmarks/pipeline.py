@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the parse and clip pipeline
+Runs parse_demo_final.py, parse_demo_enhanced.py and generate_clips.py against
+synthetic cs2json fixtures (2/10/20 players x 0/50/500 suspicious moments)
+with a stub cs2json and, unless --real-ffmpeg is given, a stub ffmpeg. The
+final pipeline also runs in-process (demo_pipeline), without interpreter
+startup per demo. Writes end-to-end and per-stage medians as JSON; --compare=<old.json> reports the
+change against an earlier run so commits can be compared.
+
+Usage: pipeline.py [--runs=N] [--out=results.json] [--compare=old.json] [--real-ffmpeg]
+"""
+
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import REPO_DIR, install_tree, write_case
+
+PLAYERS = [2, 10, 20]
+MOMENTS = [0, 50, 500]
+REGRESSION_THRESHOLD = 1.10  # flag cases more than 10% slower than the baseline
+
+
+def median_stages(samples):
+    names = {name for stages in samples for name in stages}
+    return {
+        name: round(statistics.median(stages.get(name, 0.0) for stages in samples), 5)
+        for name in sorted(names)
+    }
+
+
+def summarize(script, players, moments, mode, seconds, stages):
+    median = statistics.median(seconds)
+    result = {
+        "script": script,
+        "players": players,
+        "moments": moments,
+        "mode": mode,
+        "seconds": {"median": round(median, 5), "min": round(min(seconds), 5)},
+        "demosPerSecond": round(1 / median, 2) if median > 0 else None,
+        "stages": median_stages(stages),
+    }
+    if moments:
+        result["momentsPerSecond"] = round(moments / median, 1) if median > 0 else None
+    return result
+
+
+def clean_artifacts(root, demo):
+    shutil.rmtree(os.path.join(root, "cache"), ignore_errors=True)
+    shutil.rmtree(f"{demo}.events", ignore_errors=True)
+    for path in (f"{demo}.summary.json",):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def bench_final(root, env, demo, runs, cached):
+    """End-to-end CLI runs; stages come from the parser's own timing lines"""
+    script = os.path.join(root, "scripts", "parse_demo_final.py")
+    timing_log = env["CS2_TIMING_LOG"]
+    seconds, stages = [], []
+    if cached:
+        clean_artifacts(root, demo)
+        subprocess.run([sys.executable, script, demo], env=env, capture_output=True, check=True)
+    for _ in range(runs):
+        if not cached:
+            clean_artifacts(root, demo)
+        started = time.perf_counter()
+        subprocess.run([sys.executable, script, demo], env=env, capture_output=True, check=True)
+        seconds.append(time.perf_counter() - started)
+        with open(timing_log) as f:
+            stages.append(json.loads(f.readlines()[-1])["stages"])
+    return seconds, stages
+
+
+def in_process(root, name):
+    """A demo_pipeline pipeline wired to the benchmark tree instead of the deploy paths"""
+    import demo_pipeline
+
+    demo_pipeline.cs2json_path = os.path.join(root, "scripts", "cs2json")
+    demo_pipeline.log_path = os.path.join(root, "logs", "parser.log")
+    return demo_pipeline, demo_pipeline.PIPELINES[name]()
+
+
+def bench_enhanced(root, env, demo, runs):
+    """End-to-end CLI runs, plus the same pipeline's stages timed in-process"""
+    demo_pipeline, pipeline = in_process(root, "enhanced")
+    script = os.path.join(root, "scripts", "parse_demo_enhanced.py")
+    seconds, stages = [], []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, script, demo], env=env, capture_output=True, check=True)
+        seconds.append(time.perf_counter() - started)
+
+        timing = demo_pipeline.JobTiming(demo)
+        result = pipeline.run(demo, timing)
+        with timing.stage("serialize"):
+            json.dumps(result)
+        stages.append(timing.stages)
+    return seconds, stages
+
+
+def bench_final_in_process(root, demo, runs):
+    """Cold runs of the final pipeline in this process: no interpreter startup per demo"""
+    demo_pipeline, pipeline = in_process(root, "final")
+    seconds, stages = [], []
+    for _ in range(runs):
+        clean_artifacts(root, demo)
+        timing = demo_pipeline.JobTiming(demo)
+        started = time.perf_counter()
+        result = pipeline.run(demo, timing)
+        with timing.stage("serialize"):
+            json.dumps(result)
+        seconds.append(time.perf_counter() - started)
+        stages.append(timing.stages)
+    return seconds, stages
+
+
+def bench_clips(root, demo, runs, moments):
+    """In-process ClipGenerator runs (its CLI hard-codes the deployed cs2json path)"""
+    import generate_clips
+
+    generate_clips.CS2JSON_PATH = os.path.join(root, "scripts", "cs2json")
+    generate_clips.setup_logging(os.environ["CS2_CLIP_LOG"])
+    generate_clips.logger.setLevel(logging.WARNING)  # keep per-clip INFO lines off the console
+
+    class TimedClipGenerator(generate_clips.ClipGenerator):
+        def get_suspicious_moments(self):
+            started = time.perf_counter()
+            try:
+                return super().get_suspicious_moments()
+            finally:
+                self.stages["moments"] = time.perf_counter() - started
+
+        def filter_moments_by_sensitivity(self, moments, num_clips):
+            started = time.perf_counter()
+            try:
+                return super().filter_moments_by_sensitivity(moments, num_clips)
+            finally:
+                self.stages["filter"] = time.perf_counter() - started
+
+    seconds, stages = [], []
+    for _ in range(runs):
+        clean_artifacts(root, demo)
+        with tempfile.TemporaryDirectory(dir=root) as out:
+            generator = TimedClipGenerator(demo, out, "bench", sensitivity=5, profile="preview")
+            generator.stages = {}
+            started = time.perf_counter()
+            generator.generate_clips(min(15, max(1, moments)))
+            elapsed = time.perf_counter() - started
+        generator.stages["render"] = elapsed - sum(generator.stages.values())
+        seconds.append(elapsed)
+        stages.append(generator.stages)
+    return seconds, stages
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline):
+    """Median-time ratio per case against an earlier results file"""
+    key = lambda r: (r["script"], r["players"], r["moments"], r["mode"])
+    old = {key(r): r for r in baseline.get("results", [])}
+    rows = []
+    for r in results:
+        before = old.get(key(r))
+        if not before:
+            continue
+        ratio = r["seconds"]["median"] / before["seconds"]["median"] if before["seconds"]["median"] else None
+        rows.append({
+            "script": r["script"], "players": r["players"], "moments": r["moments"], "mode": r["mode"],
+            "before": before["seconds"]["median"], "after": r["seconds"]["median"],
+            "ratio": round(ratio, 3) if ratio else None,
+            "regression": bool(ratio and ratio > REGRESSION_THRESHOLD),
+        })
+    return {"baselineCommit": baseline.get("commit"), "cases": rows,
+            "regressions": sum(1 for row in rows if row["regression"])}
+
+
+def parse_args(argv):
+    options = {"runs": 5, "out": None, "compare": None, "real-ffmpeg": False}
+    for arg in argv:
+        name, _, value = arg.lstrip("-").partition("=")
+        if name not in options:
+            raise SystemExit(__doc__.strip().splitlines()[-1])
+        options[name] = int(value) if name == "runs" else (value or True)
+    return options
+
+
+def main():
+    options = parse_args(sys.argv[1:])
+    runs = options["runs"]
+
+    with tempfile.TemporaryDirectory(prefix="cs2-bench-") as root:
+        install_tree(root, real_ffmpeg=options["real-ffmpeg"])
+        env = dict(os.environ)
+        env.update({
+            "CS2_CACHE_DIR": os.path.join(root, "cache", "analysis"),
+            "CS2_DEDUP_DB": os.path.join(root, "cache", "dedup.sqlite"),
+            "CS2_PROFILE_DB": os.path.join(root, "cache", "profiles.sqlite"),
+            "CS2_MOMENT_DB": os.path.join(root, "cache", "moments.sqlite"),
+            "CS2_BUDGET_HISTORY": os.path.join(root, "cache", "cs2json_throughput.json"),
+            "CS2_TIMING_LOG": os.path.join(root, "logs", "timing.ndjson"),
+            "CS2_CLIP_LOG": os.path.join(root, "logs", "clip_generation.log"),
+        })
+        if not options["real-ffmpeg"]:
+            os.environ["PATH"] = os.path.join(root, "bin") + os.pathsep + os.environ["PATH"]
+        for name, value in env.items():
+            if name.startswith("CS2_"):
+                os.environ[name] = value
+
+        results = []
+        for players in PLAYERS:
+            for moments in MOMENTS:
+                demo = write_case(root, players, moments)
+                results.append(summarize("parse_demo_final", players, moments, "cold",
+                                         *bench_final(root, env, demo, runs, cached=False)))
+                results.append(summarize("parse_demo_final", players, moments, "cached",
+                                         *bench_final(root, env, demo, runs, cached=True)))
+                results.append(summarize("parse_demo_final", players, moments, "in-process",
+                                         *bench_final_in_process(root, demo, runs)))
+                results.append(summarize("parse_demo_enhanced", players, moments, "cold",
+                                         *bench_enhanced(root, env, demo, runs)))
+                results.append(summarize("generate_clips", players, moments, "cold",
+                                         *bench_clips(root, demo, runs, moments)))
+
+    report = {
+        "benchmark": "pipeline",
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "runs": runs,
+        "ffmpeg": "real" if options["real-ffmpeg"] else "stub",
+        "results": results,
+    }
+    if options["compare"]:
+        with open(options["compare"]) as f:
+            report["comparison"] = compare(results, json.load(f))
+
+    output = json.dumps(report, indent=2)
+    if options["out"]:
+        with open(options["out"], "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for the compact cs2json records (demo_records.py)
+Decodes N synthetic players and N suspicious moments from JSON and reports
+the bytes each one keeps alive as parsed dicts, as __slots__ records and as
+struct-of-arrays batches (tracemalloc), plus a lossless round-trip check.
+
+Usage: records_memory.py [--count=N] [--out=results.json]
+"""
+
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import synthetic_moments, synthetic_players
+from demo_records import MomentBatch, PlayerBatch, PlayerStats, SuspiciousMoment
+
+
+def measure(build, text):
+    """Bytes retained by build(text) and the seconds it took"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    value = build(text)
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return value, retained, elapsed
+
+
+def bench(kind, rows, record, batch):
+    text = json.dumps(rows)
+    count = len(rows)
+    forms = {
+        "dict": lambda t: json.loads(t),
+        "slots": lambda t: [record.from_json(row) for row in json.loads(t)],
+        "batch": lambda t: batch.from_json(json.loads(t)),
+    }
+    results = {}
+    for name, build in forms.items():
+        value, retained, elapsed = measure(build, text)
+        results[name] = {
+            "bytesPerRecord": round(retained / count, 1),
+            "totalMB": round(retained / 1024 / 1024, 2),
+            "buildSeconds": round(elapsed, 3),
+        }
+        if name == "slots":
+            round_trip = [r.to_json() for r in value]
+        elif name == "batch":
+            round_trip = list(value)
+            results[name]["overflowRows"] = len(value.overflow)
+        else:
+            continue
+        results[name]["lossless"] = json.dumps(round_trip) == text
+        del value, round_trip
+    dict_bytes = results["dict"]["bytesPerRecord"]
+    for name in ("slots", "batch"):
+        results[name]["vsDict"] = round(results[name]["bytesPerRecord"] / dict_bytes, 3) if dict_bytes else None
+    return {"records": kind, "count": count, "forms": results}
+
+
+def parse_args(argv):
+    options = {"count": 100000, "out": None}
+    for arg in argv:
+        name, _, value = arg.lstrip("-").partition("=")
+        if name not in options:
+            raise SystemExit(__doc__.strip().splitlines()[-1])
+        options[name] = int(value) if name == "count" else value
+    return options
+
+
+def main():
+    options = parse_args(sys.argv[1:])
+    count = options["count"]
+    rnd = random.Random(0)
+    players = synthetic_players(count, rnd)
+    moments = synthetic_moments(count, players=min(count, 5000), seed=1)
+
+    report = {
+        "benchmark": "records_memory",
+        "python": platform.python_version(),
+        "results": [
+            bench("players", players, PlayerStats, PlayerBatch),
+            bench("moments", moments, SuspiciousMoment, MomentBatch),
+        ],
+    }
+    output = json.dumps(report, indent=2)
+    if options["out"]:
+        with open(options["out"], "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""
+Stand-in for the cs2json binary in benchmarks
+Prints the fixture stored next to the demo (<demo>.fixture.json) the way
+cs2json prints its DemoSummary. CS2_STUB_DELAY adds a fixed parse time.
+"""
+
+import os
+import sys
+import time
+
+if len(sys.argv) < 2:
+    print('{"success": false, "error": "usage: cs2json <demo.dem>"}')
+    sys.exit(0)
+
+time.sleep(float(os.environ.get("CS2_STUB_DELAY", "0")))
+try:
+    with open(f"{sys.argv[1]}.fixture.json") as f:
+        sys.stdout.write(f.read() + "\n")
+except OSError as e:
+    print(f'{{"success": false, "error": "cannot open demo: {e.strerror}"}}')
@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+"""
+Stand-in for ffmpeg in benchmarks: writes a small placeholder for every
+.mp4 output on the command line, so clip generation runs without encoding.
+"""
+
+import sys
+
+for arg in sys.argv[1:]:
+    if arg.endswith(".mp4"):
+        with open(arg, "wb") as f:
+            f.write(b"\0" * 1024)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Adaptive cs2json time budget
+Instead of one fixed timeout, each run gets a budget proportional to the
+demo's size, using a rolling history of bytes/second from past successful
+runs (persisted as JSON). A hung wingman demo is killed in seconds, while a
+long 30-round demo still gets the time it needs. Kills are recorded with the
+budget that caused them, so the tuning can be checked later.
+"""
+
+import contextlib
+import fcntl
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+history_path = os.environ.get(
+    "CS2_BUDGET_HISTORY", os.path.join(base_dir, "cache", "cs2json_throughput.json")
+)
+
+HISTORY_SIZE = 100  # most recent successful runs kept
+KILL_HISTORY_SIZE = 50
+MIN_SAMPLES = 5  # below this the default rate is used
+DEFAULT_BYTES_PER_SEC = 2 * 1024 * 1024
+SAFETY_FACTOR = 3.0  # budget = expected time at a slow-run rate x this
+STARTUP_SECONDS = 10
+MIN_TIMEOUT = int(os.environ.get("CS2JSON_MIN_TIMEOUT", 20))
+MAX_TIMEOUT = int(os.environ.get("CS2JSON_MAX_TIMEOUT", 900))
+
+logger = logging.getLogger(__name__)
+
+
+def load_history(strict=False):
+    """The stored history; one that doesn't parse raises ValueError if
+    `strict`, otherwise it is reported and treated as empty"""
+    try:
+        with open(history_path) as f:
+            history = json.load(f)
+        if not isinstance(history, dict):
+            raise ValueError("not a JSON object")
+    except OSError:
+        history = {}
+    except ValueError as e:
+        if strict:
+            raise
+        logger.warning(f"cs2json throughput history unreadable, using defaults: {history_path}: {str(e)}")
+        history = {}
+    history.setdefault("runs", [])
+    history.setdefault("kills", [])
+    return history
+
+
+@contextlib.contextmanager
+def updating_history():
+    """Read-modify-write of the history under an exclusive flock, so daemon
+    threads and batch workers never lose each other's runs. A history that
+    doesn't parse is moved aside to <history>.corrupt, not overwritten.
+    """
+    os.makedirs(os.path.dirname(history_path), exist_ok=True)
+    with open(f"{history_path}.lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            history = load_history(strict=True)
+        except ValueError as e:
+            corrupt = f"{history_path}.corrupt"
+            os.replace(history_path, corrupt)
+            logger.warning(f"cs2json throughput history unreadable, moved to {corrupt}: {str(e)}")
+            history = load_history()
+        yield history
+        tmp = f"{history_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(history, f)
+        os.replace(tmp, history_path)
+
+
+def slow_rate(runs):
+    """Bytes/second of a slow run: the 10th percentile of recent history"""
+    rates = sorted(r["bytesPerSec"] for r in runs if r.get("bytesPerSec", 0) > 0)
+    if len(rates) < MIN_SAMPLES:
+        return DEFAULT_BYTES_PER_SEC
+    return rates[len(rates) // 10]
+
+
+def time_budget(size, override=None):
+    """Seconds cs2json may run on a demo of `size` bytes.
+
+    `override` (per job) wins, then CS2JSON_TIMEOUT (fixed, for all jobs),
+    then the adaptive estimate clamped to [MIN_TIMEOUT, MAX_TIMEOUT].
+    """
+    if override:
+        return float(override)
+    if os.environ.get("CS2JSON_TIMEOUT"):
+        return float(os.environ["CS2JSON_TIMEOUT"])
+    expected = size / slow_rate(load_history()["runs"])
+    return float(min(MAX_TIMEOUT, max(MIN_TIMEOUT, STARTUP_SECONDS + expected * SAFETY_FACTOR)))
+
+
+def record_run(size, seconds):
+    """Add a successful run to the rolling throughput history"""
+    if seconds <= 0 or size <= 0:
+        return
+    try:
+        with updating_history() as history:
+            history["runs"] = (history["runs"] + [{
+                "size": size,
+                "seconds": round(seconds, 3),
+                "bytesPerSec": round(size / seconds),
+            }])[-HISTORY_SIZE:]
+    except OSError as e:
+        logger.warning(f"cs2json throughput history update failed: {str(e)}")
+
+
+def record_kill(demo_path, size, budget):
+    """Remember a budget kill so too-tight budgets show up in the history"""
+    try:
+        with updating_history() as history:
+            history["kills"] = (history["kills"] + [{
+                "ts": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "demo": os.path.basename(demo_path),
+                "size": size,
+                "budget": round(budget, 1),
+                "slowRate": round(slow_rate(history["runs"])),
+            }])[-KILL_HISTORY_SIZE:]
+    except OSError as e:
+        logger.warning(f"cs2json throughput history update failed: {str(e)}")
+
+
+def main():
+    history = load_history()
+    sizes = [int(s) for s in sys.argv[1:]] or [50 * 1024 * 1024, 200 * 1024 * 1024, 500 * 1024 * 1024]
+    print(json.dumps({
+        "success": True,
+        "samples": len(history["runs"]),
+        "slowBytesPerSec": slow_rate(history["runs"]),
+        "budgets": {str(size): time_budget(size) for size in sizes},
+        "recentKills": history["kills"][-10:],
+    }))
+
+
+if __name__ == "__main__":
+    main()
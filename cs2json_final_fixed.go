@@ -57,6 +57,22 @@ type DemoSummary struct {
 	Players           []PlayerStats      `json:"players"`
 	TotalKills        int                `json:"totalKills"`
 	SuspiciousMoments []SuspiciousMoment `json:"suspiciousMoments"`
+	Events            []TimelineEvent    `json:"events"`
+}
+
+// RoundSnapshot is printed as one NDJSON line after every round when
+// CS2JSON_SNAPSHOTS=1, ahead of the final DemoSummary line, so callers can
+// show partial statistics while the rest of the demo parses
+type RoundSnapshot struct {
+	Snapshot   bool          `json:"snapshot"`
+	Round      int           `json:"round"`
+	Map        string        `json:"map"`
+	ScoreA     int           `json:"teamAScore"`
+	ScoreB     int           `json:"teamBScore"`
+	Duration   int           `json:"duration"`
+	Rounds     int           `json:"rounds"`
+	Players    []PlayerStats `json:"players"`
+	TotalKills int           `json:"totalKills"`
 }
 
 type PlayerHistory struct {
@@ -74,6 +90,18 @@ type KillEvent struct {
 	Headshot bool
 }
 
+// TimelineEvent is one kill or damage event in tick order, persisted by the
+// Python layer as a per-match columnar timeline
+type TimelineEvent struct {
+	Tick     int    `json:"tick"`
+	Type     string `json:"type"`
+	Attacker string `json:"attacker"`
+	Victim   string `json:"victim"`
+	Weapon   string `json:"weapon"`
+	Headshot bool   `json:"headshot"`
+	Damage   int    `json:"damage"`
+}
+
 type DamageEvent struct {
 	Tick     int
 	Attacker string
@@ -107,6 +135,7 @@ func main() {
 		Players:           make([]PlayerStats, 0),
 		TotalKills:        0,
 		SuspiciousMoments: make([]SuspiciousMoment, 0),
+		Events:            make([]TimelineEvent, 0),
 	}
 
 	playerMap := make(map[uint64]*PlayerStats)
@@ -118,6 +147,26 @@ func main() {
 	parser.RegisterEventHandler(func(e events.Kill) {
 		summary.TotalKills++
 
+		// Timeline entry for every kill, including world/bot kills
+		killEvent := TimelineEvent{
+			Tick:     int(e.GameState().IngameTickCount()),
+			Type:     "kill",
+			Attacker: "Unknown",
+			Victim:   "Unknown",
+			Weapon:   "Unknown",
+			Headshot: e.IsHeadshot,
+		}
+		if e.Killer != nil {
+			killEvent.Attacker = e.Killer.Name
+		}
+		if e.Victim != nil {
+			killEvent.Victim = e.Victim.Name
+		}
+		if e.Weapon != nil {
+			killEvent.Weapon = e.Weapon.String()
+		}
+		summary.Events = append(summary.Events, killEvent)
+
 		if e.Killer != nil {
 			killer := getOrCreatePlayer(e.Killer, playerMap, &players)
 			killer.Kills++
@@ -182,6 +231,19 @@ func main() {
 					Victim:   e.Player.Name,
 					Damage:   totalDamage,
 				})
+
+				weaponName := "Unknown"
+				if e.Weapon != nil {
+					weaponName = e.Weapon.String()
+				}
+				summary.Events = append(summary.Events, TimelineEvent{
+					Tick:     int(e.GameState().IngameTickCount()),
+					Type:     "damage",
+					Attacker: e.Attacker.Name,
+					Victim:   e.Player.Name,
+					Weapon:   weaponName,
+					Damage:   totalDamage,
+				})
 			}
 		}
 	})
@@ -190,6 +252,25 @@ func main() {
 		roundNum++
 	})
 
+	// Per-round snapshots keep their own score counters; the team scores in
+	// the game state are only read once parsing has finished
+	snapshots := os.Getenv("CS2JSON_SNAPSHOTS") == "1"
+	snapshotOut := json.NewEncoder(os.Stdout)
+	scoreCT, scoreT := 0, 0
+	parser.RegisterEventHandler(func(e events.RoundEnd) {
+		switch e.Winner {
+		case common.TeamCounterTerrorist:
+			scoreCT++
+		case common.TeamTerrorist:
+			scoreT++
+		}
+		if snapshots {
+			gs := parser.GameState()
+			snapshotOut.Encode(roundSnapshot(players, roundNum, gs.MapName(), scoreCT, scoreT,
+				int(gs.IngameTickCount()), summary.TotalKills))
+		}
+	})
+
 	// Parse the entire demo file
 	if err = parser.ParseToEnd(); err != nil {
 		fmt.Printf(`{"success": false, "error": "parse error: %v"}`, err)
@@ -216,36 +297,7 @@ func main() {
 
 	// Calculate statistics
 	for _, p := range players {
-		if p.Deaths == 0 {
-			p.KDRatio = float64(p.Kills)
-		} else {
-			p.KDRatio = float64(p.Kills) / float64(p.Deaths)
-		}
-
-		if p.Kills == 0 {
-			p.HSPercent = 0
-		} else {
-			p.HSPercent = (float64(p.Headshots) / float64(p.Kills)) * 100
-		}
-
-		killContribution := float64(p.Kills) * 0.5
-		deathPenalty := float64(p.Deaths) * 0.3
-		assistContribution := float64(p.Assists) * 0.15
-		p.Rating = (killContribution + assistContribution - deathPenalty) / 5.0
-		if p.Rating < 0.5 {
-			p.Rating = 0.5
-		}
-
-		if p.Kills > 0 && p.Damage > 0 {
-			estimatedShots := p.Damage / 25
-			p.Accuracy = (float64(p.Kills) / float64(estimatedShots)) * 100
-			if p.Accuracy > 100 {
-				p.Accuracy = 100
-			} else if p.Accuracy < 0 {
-				p.Accuracy = 0
-			}
-			p.Accuracy = p.Accuracy / 100.0
-		}
+		calculateStats(p)
 	}
 
 	// Detect suspicious moments
@@ -476,6 +528,73 @@ func getTeamName(team common.Team) string {
 	return "Unknown"
 }
 
+// calculateStats fills the derived per-player fields from the raw counters
+func calculateStats(p *PlayerStats) {
+	if p.Deaths == 0 {
+		p.KDRatio = float64(p.Kills)
+	} else {
+		p.KDRatio = float64(p.Kills) / float64(p.Deaths)
+	}
+
+	if p.Kills == 0 {
+		p.HSPercent = 0
+	} else {
+		p.HSPercent = (float64(p.Headshots) / float64(p.Kills)) * 100
+	}
+
+	killContribution := float64(p.Kills) * 0.5
+	deathPenalty := float64(p.Deaths) * 0.3
+	assistContribution := float64(p.Assists) * 0.15
+	p.Rating = (killContribution + assistContribution - deathPenalty) / 5.0
+	if p.Rating < 0.5 {
+		p.Rating = 0.5
+	}
+
+	if p.Kills > 0 && p.Damage > 0 {
+		estimatedShots := p.Damage / 25
+		p.Accuracy = (float64(p.Kills) / float64(estimatedShots)) * 100
+		if p.Accuracy > 100 {
+			p.Accuracy = 100
+		} else if p.Accuracy < 0 {
+			p.Accuracy = 0
+		}
+		p.Accuracy = p.Accuracy / 100.0
+	}
+}
+
+// roundSnapshot copies the players so far with their derived stats
+func roundSnapshot(players []*PlayerStats, round int, mapName string, scoreA, scoreB, tick, totalKills int) RoundSnapshot {
+	snapshot := RoundSnapshot{
+		Snapshot:   true,
+		Round:      round,
+		Map:        cleanMapName(mapName),
+		ScoreA:     scoreA,
+		ScoreB:     scoreB,
+		Duration:   tick,
+		Rounds:     round,
+		Players:    make([]PlayerStats, 0, len(players)),
+		TotalKills: totalKills,
+	}
+	if snapshot.Map == "" {
+		snapshot.Map = "Unknown"
+	}
+	for _, p := range players {
+		stats := *p
+		calculateStats(&stats)
+		if stats.Utility == nil {
+			stats.Utility = make([]string, 0)
+		}
+		if stats.Weapons == nil {
+			stats.Weapons = make(map[string]int)
+		}
+		snapshot.Players = append(snapshot.Players, stats)
+	}
+	sort.Slice(snapshot.Players, func(i, j int) bool {
+		return snapshot.Players[i].Kills > snapshot.Players[j].Kills
+	})
+	return snapshot
+}
+
 func cleanMapName(mapName string) string {
 	mapName = strings.TrimSpace(mapName)
 	mapName = strings.TrimPrefix(mapName, "de_")
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Dedup index for demo uploads
+The same match is often uploaded by several players under different random
+filenames. Each analysed demo is recorded once by size + partial hash and
+full SHA-256. A later upload with the same content is hard-linked to the
+stored copy, with its cs2json summary, so it takes no extra disk space and
+its parse can be served from the cache or the stored summary.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+
+PARTIAL_BYTES = 64 * 1024  # hashed from each end of the file
+
+
+def partial_fingerprint(path):
+    """Cheap "size:hash-of-head-and-tail" pre-check, read before any full hash"""
+    size = os.path.getsize(path)
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        h.update(f.read(PARTIAL_BYTES))
+        if size > PARTIAL_BYTES:
+            f.seek(max(PARTIAL_BYTES, size - PARTIAL_BYTES))
+            h.update(f.read(PARTIAL_BYTES))
+    return size, h.hexdigest()
+
+
+class DemoDedupIndex:
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=30)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS demos (
+                sha256 TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                partial TEXT NOT NULL,
+                path TEXT NOT NULL,
+                cpu_seconds REAL NOT NULL DEFAULT 0,
+                first_seen TEXT NOT NULL
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS demos_fingerprint ON demos (size, partial);
+        """)
+
+    def close(self):
+        self.db.close()
+
+    def candidates(self, size, partial):
+        """{sha256: (path, cpu_seconds)} of stored demos sharing the fingerprint"""
+        rows = self.db.execute(
+            "SELECT sha256, path, cpu_seconds FROM demos WHERE size = ? AND partial = ?",
+            (size, partial),
+        ).fetchall()
+        return {sha: (path, cpu) for sha, path, cpu in rows}
+
+    def record(self, sha256, size, partial, path, cpu_seconds):
+        """Remember the first stored copy of a demo; later copies keep pointing at it"""
+        with self.db:
+            self.db.execute(
+                "INSERT OR IGNORE INTO demos (sha256, size, partial, path, cpu_seconds, first_seen) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (sha256, size, partial, path, cpu_seconds, time.strftime("%Y-%m-%d %H:%M:%S")),
+            )
+
+    def forget(self, sha256):
+        with self.db:
+            self.db.execute("DELETE FROM demos WHERE sha256 = ?", (sha256,))
+
+
+def link_into(source, target):
+    """Atomically replace `target` with a hard link to `source`"""
+    tmp = f"{target}.{os.getpid()}.link"
+    os.link(source, tmp)
+    os.replace(tmp, target)
+
+
+def main():
+    if len(sys.argv) < 3:
+        print(json.dumps({"success": False, "error": "Usage: demo_dedup.py <dedup.sqlite> <demo.dem>"}))
+        sys.exit(1)
+    index = DemoDedupIndex(sys.argv[1])
+    size, partial = partial_fingerprint(sys.argv[2])
+    matches = index.candidates(size, partial)
+    index.close()
+    print(json.dumps({
+        "success": True,
+        "size": size,
+        "partial": partial,
+        "candidates": {sha: path for sha, (path, _) in matches.items()},
+    }))
+
+
+if __name__ == "__main__":
+    main()
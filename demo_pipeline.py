@@ -0,0 +1,1632 @@
+#!/usr/bin/env python3
+"""
+Demo parse pipeline
+The one importable implementation behind parse_demo_final.py,
+parse_demo_enhanced.py and scripts/parse_demo.py: cs2json path resolution,
+logging, the cs2json run and the JSON shaping. A DemoParsePipeline runs five
+pluggable stages per demo,
+
+    preflight -> extract -> normalize -> score -> emit
+
+and keeps no per-demo state, so one instance parses any number of demos in
+one process (batch, daemon and benchmark modes). The scripts are CLI shims
+over final_pipeline(), enhanced_pipeline() and basic_pipeline().
+
+    from demo_pipeline import final_pipeline
+    result = final_pipeline().run("/path/to/match.dem")
+"""
+import subprocess, sys, json, os, time, math, hashlib
+import socket, socketserver, threading, queue, tempfile, resource, glob, sqlite3
+import cProfile, contextlib, fcntl
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from demo_preflight import preflight, DemoRejected
+from demo_dedup import DemoDedupIndex, partial_fingerprint, link_into
+from cs2json_budget import time_budget, record_run, record_kill
+
+try:
+    import event_timeline
+except ImportError:  # numpy missing: parse without persisting event timelines
+    event_timeline = None
+
+try:
+    from player_profiles import PlayerProfileIndex, zscores
+except ImportError:
+    PlayerProfileIndex = None
+
+try:
+    from moment_index import MomentIndex
+except ImportError:
+    MomentIndex = None
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+cs2json_path = os.path.join(base_dir, "scripts", "cs2json")
+log_path = os.path.join(base_dir, "logs", "parser.log")
+timing_log_path = os.environ.get("CS2_TIMING_LOG", os.path.join(base_dir, "logs", "parser_timing.ndjson"))
+cache_dir = os.environ.get("CS2_CACHE_DIR", os.path.join(base_dir, "cache", "analysis"))
+cache_max_bytes = int(os.environ.get("CS2_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+socket_path = os.environ.get("CS2_PARSER_SOCKET", os.path.join(base_dir, "run", "parser.sock"))
+dedup_db = os.environ.get("CS2_DEDUP_DB", os.path.join(base_dir, "cache", "dedup.sqlite"))
+profile_db = os.environ.get("CS2_PROFILE_DB", os.path.join(base_dir, "cache", "player_profiles.sqlite"))
+moment_db = os.environ.get("CS2_MOMENT_DB", os.path.join(base_dir, "cache", "moment_index.sqlite"))
+
+# Bump whenever the post-processing below changes its output, so stale cache
+# entries are never served for a new scoring/shaping version.
+POSTPROCESS_VERSION = "final-1"
+
+def log(msg):
+    try:
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        with open(log_path, "a") as f:
+            f.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} - {msg}\n")
+    except:
+        pass
+
+# 🔹 Per-job stage timings, one JSON object per line in timing_log_path
+class JobTiming:
+    """Wall-clock seconds spent in each pipeline stage of one job"""
+
+    def __init__(self, demo_path):
+        self.demo = demo_path
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.info = {}
+
+    def add(self, stage, seconds):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def emit(self, result):
+        entry = {
+            "ts": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "demo": self.demo,
+            "success": bool(result.get("success")),
+            "totalSeconds": round(time.perf_counter() - self.started, 4),
+            "stages": {name: round(sec, 4) for name, sec in self.stages.items()},
+            **self.info,
+        }
+        if not entry["success"]:
+            entry["error"] = result.get("error")
+        try:
+            os.makedirs(os.path.dirname(timing_log_path), exist_ok=True)
+            with open(timing_log_path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+        except OSError:
+            pass
+
+# 🔹 Result cache: demo content hash + cs2json build + post-processing version
+# Warm state for long-lived (daemon) processes: skip re-checking unchanged files
+hash_memo = {}
+
+def demo_hash(path):
+    """SHA-256 of a demo from the pre-flight pass; raises DemoRejected for bad files"""
+    st = os.stat(path)
+    memo_key = (path, st.st_size, st.st_mtime_ns)
+    if memo_key not in hash_memo:
+        if len(hash_memo) > 1024:
+            hash_memo.clear()
+        demo = preflight(path)
+        log(f"preflight ok: {demo['size']} bytes, {demo['frames']} frames in {demo['elapsed']*1000:.0f}ms")
+        hash_memo[memo_key] = demo["sha256"]
+    return hash_memo[memo_key]
+
+def cache_key(demo_hash):
+    st = os.stat(cs2json_path)
+    raw = f"{demo_hash}:{st.st_size}:{st.st_mtime_ns}:{POSTPROCESS_VERSION}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+def cache_count(field, amount=1):
+    """Bump a persistent counter (hits, misses, dedup savings) and return the current totals.
+
+    The read-modify-write runs under an exclusive flock on stats.lock, so
+    daemon threads and batch workers never lose each other's increments.
+    """
+    stats_path = os.path.join(cache_dir, "stats.json")
+    stats = {"hits": 0, "misses": 0}
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(os.path.join(cache_dir, "stats.lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                with open(stats_path) as f:
+                    stats.update(json.load(f))
+            except (OSError, ValueError):
+                pass
+            stats[field] = stats.get(field, 0) + amount
+            tmp = f"{stats_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(stats, f)
+            os.replace(tmp, stats_path)
+    except OSError as e:
+        log(f"cache stats update failed: {str(e)}")
+    return stats
+
+def cache_get(key):
+    entry = os.path.join(cache_dir, f"{key}.json")
+    try:
+        with open(entry) as f:
+            analysis = json.load(f)
+        # mtime doubles as the LRU timestamp
+        os.utime(entry)
+        return analysis
+    except:
+        return None
+
+def cache_put(key, analysis):
+    os.makedirs(cache_dir, exist_ok=True)
+    entry = os.path.join(cache_dir, f"{key}.json")
+    tmp = f"{entry}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(analysis, f)
+    os.replace(tmp, entry)
+    cache_evict()
+
+def cache_evict():
+    """Drop least recently used entries until the cache fits in cache_max_bytes"""
+    entries = []
+    total = 0
+    for name in os.listdir(cache_dir):
+        if not name.endswith(".json") or name == "stats.json":
+            continue
+        try:
+            st = os.stat(os.path.join(cache_dir, name))
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, name))
+        total += st.st_size
+    entries.sort()
+    for _, size, name in entries:
+        if total <= cache_max_bytes:
+            break
+        try:
+            os.remove(os.path.join(cache_dir, name))
+            total -= size
+            log(f"cache evict: {name}")
+        except OSError:
+            pass
+
+# 🔹 Raw cs2json DemoSummary persisted next to the demo, shared with generate_clips.py
+def summary_path_for(path):
+    return f"{path}.summary.json"
+
+def has_summary(path):
+    summary = open_summary(path)
+    if summary is None:
+        return False
+    summary.close()
+    return True
+
+def open_summary(path):
+    """Open the stored cs2json output for a demo, or return None if missing/stale"""
+    summary = summary_path_for(path)
+    try:
+        if os.path.getmtime(summary) < os.path.getmtime(path):
+            return None
+        if os.path.getmtime(summary) < os.path.getmtime(cs2json_path):
+            return None
+        return open(summary)
+    except OSError:
+        return None
+
+# 🔹 Upload dedup: repeat uploads of a match are hard-linked to the first stored copy
+def cpu_seconds():
+    """CPU used so far by this process and its finished children (cs2json).
+
+    In the threaded daemon concurrent jobs share these counters, so per-job
+    deltas are an upper bound there.
+    """
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+def find_duplicate(demo_path, fingerprint):
+    """Stored copy of this demo as (path, cpu_seconds), or None.
+
+    The size + partial hash fingerprint narrows the lookup; only a candidate
+    with the same full hash (from the pre-flight pass) counts as a duplicate.
+    """
+    index = DemoDedupIndex(dedup_db)
+    try:
+        candidates = index.candidates(*fingerprint)
+        if not candidates:
+            return None
+        digest = demo_hash(demo_path)
+        if digest not in candidates:
+            return None
+        canonical, cpu = candidates[digest]
+        if not os.path.exists(canonical):
+            index.forget(digest)  # stored copy is gone; this upload takes its place
+            return None
+        if os.path.samefile(canonical, demo_path):
+            return None
+        return canonical, cpu
+    finally:
+        index.close()
+
+def link_duplicate(demo_path, canonical):
+    """Point a repeat upload (and its summary/timeline) at the stored copy"""
+    size = os.path.getsize(demo_path)
+    link_into(canonical, demo_path)
+    if os.path.exists(summary_path_for(canonical)):
+        link_into(summary_path_for(canonical), summary_path_for(demo_path))
+    if event_timeline:
+        timeline = event_timeline.timeline_dir_for(canonical)
+        if os.path.isdir(timeline) and not os.path.exists(event_timeline.timeline_dir_for(demo_path)):
+            os.symlink(timeline, event_timeline.timeline_dir_for(demo_path))
+    return size
+
+def record_demo(demo_path, fingerprint, cpu):
+    try:
+        index = DemoDedupIndex(dedup_db)
+        try:
+            index.record(demo_hash(demo_path), *fingerprint, os.path.abspath(demo_path), cpu)
+        finally:
+            index.close()
+    except (OSError, sqlite3.Error) as e:
+        log(f"dedup index unavailable: {str(e)}")
+
+# 🔹 Incremental reader for cs2json's DemoSummary JSON
+class SummaryStream:
+    """Parse a DemoSummary object from a text stream without buffering it whole.
+
+    Top-level scalars land in `fields` and `players` are yielded one at a time
+    by players(). `events` and `suspiciousMoments` are counted and handed one
+    by one to `self.events.append` / `self.moments.append` when a collector is
+    set, so memory stays flat however long the demo is. Every chunk read is
+    copied to `tee` if given.
+    """
+    CHUNK = 64 * 1024
+    NUMBER_CHARS = frozenset("0123456789.eE+-")
+    decoder = json.JSONDecoder()
+
+    def __init__(self, fh, tee=None):
+        self.fh = fh
+        self.tee = tee
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.first = True
+        self.in_players = False
+        self.fields = {}
+        self.moment_count = 0
+        self.events = None
+        self.moments = None
+        self.read_seconds = 0.0  # blocked waiting for cs2json / the summary file
+        self.decode_seconds = 0.0
+
+    def fill(self):
+        started = time.perf_counter()
+        chunk = self.fh.read(self.CHUNK)
+        self.read_seconds += time.perf_counter() - started
+        if not chunk:
+            self.eof = True
+            return
+        if self.tee:
+            self.tee.write(chunk)
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+
+    def peek(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if self.eof:
+                raise json.JSONDecodeError("Unexpected end of cs2json output", self.buf, self.pos)
+            self.fill()
+
+    def expect(self, ch):
+        if self.peek() != ch:
+            raise json.JSONDecodeError(f"Expected '{ch}'", self.buf, self.pos)
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        started = time.perf_counter()
+        reads = self.read_seconds
+        try:
+            while True:
+                try:
+                    val, end = self.decoder.raw_decode(self.buf, self.pos)
+                    # A number cut off by the buffer edge decodes too short ("1" of
+                    # "1.5e10" when the chunk ends at "1." or "1.5e"): read more first
+                    cut = end == len(self.buf) or (
+                        type(val) in (int, float) and self.buf[end] in self.NUMBER_CHARS
+                    )
+                    if not cut or self.eof:
+                        self.pos = end
+                        return val
+                except json.JSONDecodeError:
+                    if self.eof:
+                        raise
+                self.fill()
+        finally:
+            self.decode_seconds += time.perf_counter() - started - (self.read_seconds - reads)
+
+    def array(self):
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            ch = self.peek()
+            self.pos += 1
+            if ch == "]":
+                return
+            if ch != ",":
+                raise json.JSONDecodeError("Expected ',' or ']'", self.buf, self.pos - 1)
+
+    def read_header(self):
+        """Read top-level fields up to the start of the players array"""
+        self.expect("{")
+        self.advance()
+        return self.fields
+
+    def advance(self):
+        while self.peek() != "}":
+            if not self.first:
+                self.expect(",")
+            self.first = False
+            key = self.value()
+            self.expect(":")
+            if key == "players" and self.peek() == "[":
+                self.in_players = True
+                return
+            if key == "suspiciousMoments" and self.peek() == "[":
+                for moment in self.array():
+                    self.moment_count += 1
+                    if self.moments is not None:
+                        self.moments.append(moment)
+                continue
+            if key == "events" and self.peek() == "[":
+                for event in self.array():
+                    if self.events is not None:
+                        self.events.append(event)
+                continue
+            self.fields[key] = self.value()
+        self.pos += 1
+
+    def players(self):
+        """Yield raw players one by one, then read the rest of the document"""
+        if self.in_players:
+            self.in_players = False
+            yield from self.array()
+            self.advance()
+
+# 🔹 Progressive mode: per-round snapshots ahead of the final DemoSummary
+class SnapshotReader:
+    """File-like filter over cs2json stdout run with CS2JSON_SNAPSHOTS=1.
+
+    Leading `{"snapshot": ...}` lines are decoded and handed to `on_snapshot`;
+    from the first other line on, read() passes the output through untouched,
+    so SummaryStream still streams (and tees) only the final document.
+    """
+    PREFIX = '{"snapshot":'
+
+    def __init__(self, fh, on_snapshot):
+        self.fh = fh
+        self.on_snapshot = on_snapshot
+        self.pending = ""
+        self.passthrough = False
+        self.snapshots = 0
+        self.callback_seconds = 0.0  # time spent in on_snapshot, not in cs2json
+
+    def read(self, size=-1):
+        while not self.passthrough:
+            # Peek at the prefix only: the final document is one very long line
+            head = self.fh.read(len(self.PREFIX))
+            if head != self.PREFIX:
+                self.pending = head
+                self.passthrough = True
+                break
+            line = head + self.fh.readline()
+            started = time.perf_counter()
+            try:
+                self.on_snapshot(json.loads(line))
+                self.snapshots += 1
+            except Exception as e:
+                log(f"snapshot skipped: {str(e)}")
+            self.callback_seconds += time.perf_counter() - started
+        if self.pending:
+            chunk, self.pending = self.pending, ""
+            return chunk
+        return self.fh.read(size)
+
+# 🔹 Pipeline core
+STAGES = ("preflight", "extract", "normalize", "score", "emit")
+PROCESSING_STAGES = ("normalize", "score", "emit")
+
+class ParseError(Exception):
+    """Ends a job with {"success": false, "error": <message>}"""
+
+def fail(msg):
+    log(msg)
+    return {"success": False, "error": msg}
+
+class DemoJob:
+    """State one run() hands from stage to stage"""
+
+    def __init__(self, pipeline, demo_path, timing=None, timeout=None, on_partial=None):
+        self.pipeline = pipeline
+        self.demo_path = demo_path
+        self.timing = timing
+        self.timeout = timeout  # overrides the adaptive cs2json budget
+        self.on_partial = on_partial  # progressive mode: gets a partial result per round
+        self.demo = None  # preflight(): sha256, size, frames
+        self.parsed = {}  # top-level DemoSummary fields
+        self.raw_players = []
+        self.players = []
+        self.fraud_assessments = []
+        self.profiles = None
+        self.state = {}  # stage-private values (cache key, dedup fingerprint, ...)
+        self.result = None  # set early by a stage (e.g. a cache hit) to skip the rest
+
+class DemoParsePipeline:
+    """Parse demos through preflight -> extract -> normalize -> score -> emit.
+
+    Each stage is a callable taking the DemoJob; None skips it. A stage ends
+    the job early by setting `job.result` or raising ParseError, and emit
+    sets the final `job.result`. with_stages() derives a variant with some
+    stages swapped out.
+    """
+
+    def __init__(self, name, preflight=None, extract=None, normalize=None, score=None, emit=None):
+        self.name = name
+        self.stages = {
+            "preflight": preflight,
+            "extract": extract,
+            "normalize": normalize,
+            "score": score,
+            "emit": emit,
+        }
+
+    def with_stages(self, name=None, **stages):
+        unknown = set(stages) - set(STAGES)
+        if unknown:
+            raise ValueError(f"Unknown pipeline stage: {', '.join(sorted(unknown))}")
+        return DemoParsePipeline(name or self.name, **{**self.stages, **stages})
+
+    def run(self, demo_path, timing=None, timeout=None, on_partial=None):
+        """Parse one demo and return the result dict (never raises).
+
+        Stage timings go into `timing`; without one the job's timing line is
+        written here, otherwise the caller emits it after serialising the result.
+        `timeout` overrides the adaptive cs2json time budget for this job.
+        `on_partial` receives a partial result after every round when the
+        extract stage streams cs2json; cached results arrive as the final one only.
+        """
+        if timing is not None:
+            return self.execute(DemoJob(self, demo_path, timing, timeout, on_partial))
+        timing = JobTiming(demo_path)
+        result = self.execute(DemoJob(self, demo_path, timing, timeout, on_partial))
+        timing.emit(result)
+        return result
+
+    def run_many(self, demo_paths, **options):
+        """Yield (demo_path, result) for each demo in turn, all in this process"""
+        for demo_path in demo_paths:
+            yield demo_path, self.run(demo_path, **options)
+
+    def execute(self, job):
+        job.timing.info["pipeline"] = self.name
+        name = None
+        try:
+            for name in STAGES:
+                if job.result is not None:
+                    break
+                if self.stages[name] is not None:
+                    with job.timing.stage(name):
+                        self.stages[name](job)
+        except ParseError as e:
+            return fail(str(e))
+        except DemoRejected as e:
+            return fail(f"Invalid demo file: {str(e)}")
+        except json.JSONDecodeError as e:
+            return fail(f"Failed to parse cs2json output: {str(e)}")
+        except subprocess.TimeoutExpired as e:
+            return fail(f"cs2json timeout after {e.timeout:.0f}s")
+        except Exception as e:
+            if name in PROCESSING_STAGES:
+                return fail(f"Failed to process demo: {str(e)}")
+            return fail(f"Unexpected error: {str(e)}")
+        finally:
+            if job.profiles is not None:  # left open by a job that failed after scoring
+                job.profiles.close()
+        if job.result is None:
+            return fail(f"Pipeline '{self.name}' has no emit stage")
+        return job.result
+
+    def partial(self, demo_path, snapshot):
+        """Partial result for one cs2json round snapshot: normalized stats, no scoring"""
+        job = DemoJob(self, demo_path)
+        job.parsed = snapshot
+        job.raw_players = snapshot.get("players", [])
+        if self.stages["normalize"] is not None:
+            self.stages["normalize"](job)
+        return {"success": True, "partial": True, "round": snapshot.get("round", 0), **analysis_result(job)}
+
+
+# 🔹 Preflight and extract stages
+def check_inputs(job):
+    if not os.path.exists(cs2json_path):
+        raise ParseError(f"cs2json binary not found at {cs2json_path}")
+    if not os.path.exists(job.demo_path):
+        raise ParseError(f"demo not found: {job.demo_path}")
+
+def preflight_demo(job):
+    """Reject truncated / non-CS2 files before cs2json runs; the hash keys the profile index"""
+    check_inputs(job)
+    try:
+        job.demo = preflight(job.demo_path)
+    except OSError as e:
+        raise DemoRejected(str(e))
+    demo = job.demo
+    log(f"preflight ok: {demo['size']} bytes, {demo['frames']} frames in {demo['elapsed']*1000:.0f}ms")
+
+def check_summary(parsed):
+    if not parsed.get("success"):
+        raise ParseError(parsed.get("error", "Unknown error from cs2json"))
+
+def cs2json_output(job):
+    """Run cs2json to completion within its time budget and decode its JSON output"""
+    size = job.demo["size"] if job.demo else os.path.getsize(job.demo_path)
+    budget = time_budget(size, job.timeout)
+    job.timing.info["budgetSeconds"] = round(budget, 1)
+    started = time.time()
+    try:
+        proc = subprocess.run(
+            [cs2json_path, job.demo_path],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            timeout=budget
+        )
+    except subprocess.TimeoutExpired:
+        record_kill(job.demo_path, size, budget)
+        raise
+    if proc.returncode != 0:
+        raise ParseError(proc.stderr.strip())
+    record_run(size, time.time() - started)
+
+    with job.timing.stage("decode"):
+        return json.loads(proc.stdout)
+
+def run_cs2json(job):
+    """cs2json's DemoSummary, rejected unless it reports success"""
+    parsed = cs2json_output(job)
+    check_summary(parsed)
+    job.raw_players = parsed.pop("players", [])
+    job.parsed = parsed
+
+def run_cs2json_unchecked(job):
+    """run_cs2json without check_summary: like the original scripts/parse_demo.py,
+    the basic parser accepts cs2json output that carries no `success` field"""
+    parsed = cs2json_output(job)
+    job.raw_players = parsed.pop("players", [])
+    job.parsed = parsed
+
+# 🔹 Normalize stages: raw cs2json players -> analysis player records
+def extract_map_from_filename(filepath):
+    maps = ["mirage", "inferno", "ancient", "nuke", "overpass", "vertigo", "dust2", "anubis", "train"]
+    filename = os.path.basename(filepath).lower()
+    for m in maps:
+        if m in filename:
+            return m.capitalize()
+    return "Unknown"
+
+def game_mode_for(total_players):
+    if total_players <= 4:
+        return "wingman"
+    elif total_players <= 8:
+        return "deathmatch"
+    return "5v5"
+
+def shape_player(p, estimate_missing=False):
+    """One analysis player record from a raw cs2json player.
+
+    With `estimate_missing`, accuracy and rating that cs2json left at zero are
+    estimated from kills, assists, deaths and damage.
+    """
+    # Get REAL stats from Go binary output
+    team = p.get("team", "Counter-Terrorists")
+    kills = p.get("kills", 0)
+    deaths = max(p.get("deaths", 0), 1)
+    assists = p.get("assists", 0)
+    headshots = p.get("headshots", 0)
+    damage = p.get("damage", 0)
+    plants = p.get("plants", 0)
+    defuses = p.get("defuses", 0)
+    utility = p.get("utility", [])
+
+    # Calculate real accuracy and percentages from Go data
+    hs_percent = 0.0
+    if kills > 0:
+        hs_percent = round((headshots / kills) * 100, 1)
+
+    kd_ratio = round(kills / deaths, 2) if deaths > 0 else float(kills)
+
+    # Get accuracy from Go binary data
+    accuracy = p.get("accuracy", 0.0)
+    if estimate_missing and accuracy == 0 and damage > 0:
+        # Estimate accuracy based on damage to kill ratio
+        accuracy = round(min(100, (kills * 25) / damage * 100), 2) / 100
+
+    # Use Go binary's rating or calculate
+    rating = p.get("rating", 0.0)
+    if estimate_missing and rating == 0:
+        rating = round((kills + assists * 0.3 - deaths * 0.7) / 5.0, 2)
+        if rating < 0.5:
+            rating = 0.5
+
+    return {
+        "name": p.get("name", "Unknown"),
+        "steamId": str(p.get("steamId", 0)),
+        "team": team,
+        "kills": kills,
+        "deaths": deaths,
+        "assists": assists,
+        "accuracy": round(accuracy, 2) if isinstance(accuracy, float) else accuracy,
+        "headshots": headshots,
+        "hsPercent": hs_percent,
+        "totalDamage": damage,
+        "avgDamage": round(damage / max(deaths + kills, 1), 1),
+        "kdRatio": kd_ratio,
+        "plants": plants,
+        "defuses": defuses,
+        "utility": utility if utility else [],
+        "rating": round(rating, 2)
+    }
+
+def normalize_players(job):
+    job.players = [shape_player(p) for p in job.raw_players]
+
+def normalize_estimated(job):
+    """normalize_players, estimating what cs2json left at zero (stats and 5v5 scores)"""
+    job.players = [shape_player(p, estimate_missing=True) for p in job.raw_players]
+
+    team_a_score = job.parsed.get("teamAScore", 0)
+    team_b_score = job.parsed.get("teamBScore", 0)
+    if team_a_score != 0 or team_b_score != 0 or game_mode_for(len(job.players)) != "5v5":
+        return
+    team_a_kills = sum(p["kills"] for p in job.players if p["team"] == "Counter-Terrorists")
+    team_b_kills = sum(p["kills"] for p in job.players if p["team"] != "Counter-Terrorists")
+    total_kills = team_a_kills + team_b_kills
+    if total_kills > 0:
+        team_a_score = min(16, int((team_a_kills / total_kills) * 16))
+        team_b_score = min(16, int((team_b_kills / total_kills) * 16))
+
+        # Ensure valid score
+        if team_a_score == team_b_score:
+            team_a_score = max(13, team_a_score)
+        elif team_a_score < team_b_score:
+            team_a_score = max(0, team_b_score - 1)
+    else:
+        team_a_score = 16
+        team_b_score = 14
+    job.parsed["teamAScore"] = team_a_score
+    job.parsed["teamBScore"] = team_b_score
+
+# 🔹 Score stages
+def assess_final(players):
+    """Per-player fraud assessment of parse_demo_final.py"""
+    # 🔹 Generate fraud assessments based on REAL statistics with improved calculation
+    fraud_assessments = []
+    
+    for player in players:
+        # Use real stats for fraud assessment calculation
+        accuracy_val = player["accuracy"] if isinstance(player["accuracy"], (int, float)) else 0.0
+        hs_pct = player["hsPercent"]
+        kd = player["kdRatio"]
+        kills = player["kills"]
+        damage = player["totalDamage"]
+        
+        # Fraud scoring based on statistical anomalies
+        fraud_prob = 0.0
+        suspicious = []
+        
+        # ============ AIM SCORE ============
+        # Unusual accuracy (typically 20-40% in real matches)
+        if accuracy_val > 0.50:
+            fraud_prob += min(40, (accuracy_val - 0.50) * 800)  # Heavy weight on very high accuracy
+            suspicious.append({
+                "type": "unusual_accuracy",
+                "confidence": round(min(95, accuracy_val * 150), 1),
+                "description": f"Very high accuracy: {accuracy_val*100:.1f}%",
+                "tick": 0
+            })
+        elif accuracy_val > 0.40:
+            fraud_prob += min(25, (accuracy_val - 0.40) * 500)
+            suspicious.append({
+                "type": "unusual_accuracy",
+                "confidence": round(min(85, accuracy_val * 130), 1),
+                "description": f"High accuracy: {accuracy_val*100:.1f}%",
+                "tick": 0
+            })
+        
+        # ============ HEADSHOT RATE ============
+        # Typical HS% is 15-30%, above 45% is suspicious
+        if hs_pct > 50:
+            fraud_prob += min(50, (hs_pct - 50) * 2)  # Heavy weight
+            suspicious.append({
+                "type": "abnormal_headshot_rate",
+                "confidence": round(min(95, hs_pct * 1.5), 1),
+                "description": f"Extremely high HS rate: {hs_pct:.1f}%",
+                "tick": 0
+            })
+        elif hs_pct > 40:
+            fraud_prob += min(35, (hs_pct - 40) * 3)
+            suspicious.append({
+                "type": "high_headshot_rate",
+                "confidence": round(min(85, hs_pct * 1.5), 1),
+                "description": f"High HS rate: {hs_pct:.1f}%",
+                "tick": 0
+            })
+        
+        # ============ K/D RATIO ============
+        # Typical K/D is 0.8-1.2, above 2.5 is very rare for normal play
+        if kd > 3.5:
+            fraud_prob += min(45, (kd - 3.5) * 20)  # Heavy weight on extreme K/D
+            suspicious.append({
+                "type": "extreme_kd_ratio",
+                "confidence": round(min(95, kd * 20), 1),
+                "description": f"Extreme K/D ratio: {kd:.2f}",
+                "tick": 0
+            })
+        elif kd > 2.5:
+            fraud_prob += min(35, (kd - 2.5) * 15)
+            suspicious.append({
+                "type": "high_kd_ratio",
+                "confidence": round(min(85, kd * 20), 1),
+                "description": f"Very high K/D: {kd:.2f}",
+                "tick": 0
+            })
+        elif kd > 1.8:
+            fraud_prob += min(20, (kd - 1.8) * 10)
+        
+        # ============ KILL COUNT ============
+        # Very high kills relative to match duration
+        if kills > 30:
+            fraud_prob += min(30, (kills - 30) * 2)
+            suspicious.append({
+                "type": "extreme_kill_count",
+                "confidence": round(min(90, (kills / 50) * 100), 1),
+                "description": f"Exceptionally high kill count: {kills}",
+                "tick": 0
+            })
+        elif kills > 25:
+            fraud_prob += min(20, (kills - 25) * 1.5)
+        
+        # ============ DAMAGE CONSISTENCY ============
+        # Average damage per kill should be 50-80 in most matches
+        if kills > 0:
+            avg_dmg_per_kill = damage / kills
+            if avg_dmg_per_kill < 20 and kills > 5:
+                # Too low damage for kills - suspicious (lock aim but low damage = wallhack?)
+                fraud_prob += min(25, (20 - avg_dmg_per_kill) * 2)
+        
+        # ============ RATING-BASED ANOMALIES ============
+        rating = player["rating"]
+        if rating > 1.5:
+            fraud_prob += min(25, (rating - 1.5) * 30)
+        
+        # ============ COMBINATION PATTERNS ============
+        # Multiple suspicious indicators combined
+        if len(suspicious) > 2:
+            fraud_prob += 10  # Penalty for multiple anomalies
+        
+        # Normalize to 0-100
+        fraud_prob = min(100, max(0, fraud_prob))
+        
+        # Determine risk level
+        if fraud_prob >= 75:
+            risk_level = "critical"
+        elif fraud_prob >= 55:
+            risk_level = "high"
+        elif fraud_prob >= 35:
+            risk_level = "medium"
+        else:
+            risk_level = "low"
+        
+        # Additional suspicious activities based on patterns
+        if kills > 15 and (hs_pct > 30 or accuracy_val > 0.45):
+            if not any(s["type"] == "consistent_flicking" for s in suspicious):
+                suspicious.append({
+                    "type": "consistent_flicking",
+                    "confidence": round(min(80, (kills / 40) * 100), 1),
+                    "description": f"Consistent headshot flicking pattern in {kills} kills",
+                    "tick": 0
+                })
+        
+        # Personal/team performance score
+        team_mate_avg_kd = 1.0  # Would calculate from teammates
+        if kd > team_mate_avg_kd * 2:
+            suspicious.append({
+                "type": "isolated_performance",
+                "confidence": round(min(70, (kd / team_mate_avg_kd - 2) * 30), 1),
+                "description": f"Performance significantly above team average",
+                "tick": 0
+            })
+        
+        fraud_assessments.append({
+            "playerName": player["name"],
+            "fraudProbability": round(fraud_prob, 1),
+            "aimScore": round(min(100, (accuracy_val * 100 + hs_pct) / 2), 1),
+            "positioningScore": round(min(100, kd * 40), 1),
+            "reactionScore": round(min(100, hs_pct * 2.5), 1),
+            "gameSenseScore": round(min(100, player["assists"] * 15), 1),
+            "consistencyScore": round(min(100, (kills / max(1, kills + player["deaths"])) * 80), 1),
+            "suspiciousActivities": suspicious,
+            "riskLevel": risk_level
+        })
+    return fraud_assessments
+
+def assess_players(players, baselines=None):
+    """Per-player fraud assessment used by the CLI and as the parity reference.
+
+    With `baselines` ({steamId: profile} from PlayerProfileIndex) each player is
+    also compared with their own history via z-scores.
+    """
+    # 🔹 Generate fraud assessments based on REAL statistics
+    fraud_assessments = []
+    
+    for player in players:
+        # Use real stats for fraud assessment calculation
+        accuracy_val = player["accuracy"] if isinstance(player["accuracy"], (int, float)) else 0.0
+        hs_pct = player["hsPercent"]
+        kd = player["kdRatio"]
+        
+        # Fraud scoring based on real stats
+        aim_score = min(100, (accuracy_val * 100 + hs_pct) / 2)
+        consistency_score = min(100, kd * 30)
+        
+        # Fraud probability based on statistical anomalies
+        fraud_prob = 0.0
+        
+        if accuracy_val > 0.55:
+            fraud_prob += 25  # Unusually high accuracy
+        if hs_pct > 50:
+            fraud_prob += 30  # Unusually high headshot rate
+        if kd > 3.0:
+            fraud_prob += 15  # Very high K/D ratio
+        
+        # Normalize to 0-100
+        fraud_prob = min(100, max(0, fraud_prob))
+        
+        # Determine risk level
+        if fraud_prob >= 70:
+            risk_level = "critical"
+        elif fraud_prob >= 50:
+            risk_level = "high"
+        elif fraud_prob >= 30:
+            risk_level = "medium"
+        else:
+            risk_level = "low"
+        
+        # Generate suspicious activities based on REAL stats
+        suspicious = []
+        
+        if accuracy_val > 0.50:
+            suspicious.append({
+                "type": "unusual_accuracy",
+                "confidence": round(min(95, accuracy_val * 150), 1),
+                "description": f"High accuracy: {accuracy_val*100:.1f}%",
+                "tick": 0
+            })
+        
+        if hs_pct > 45:
+            suspicious.append({
+                "type": "high_headshot_rate",
+                "confidence": round(min(95, hs_pct * 1.5), 1),
+                "description": f"High HS rate: {hs_pct:.1f}%",
+                "tick": 0
+            })
+        
+        if kd > 2.5:
+            suspicious.append({
+                "type": "high_kd_ratio",
+                "confidence": round(min(95, kd * 25), 1),
+                "description": f"High K/D: {kd:.2f}",
+                "tick": 0
+            })
+        
+        if player["kills"] > 30:
+            suspicious.append({
+                "type": "high_kill_count",
+                "confidence": round(min(90, (player["kills"] / 50) * 100), 1),
+                "description": f"Very high kills: {player['kills']}",
+                "tick": 0
+            })
+        
+        z = {}
+        if baselines is not None:
+            z = zscores(player, baselines.get(player["steamId"]))
+            for metric in ("accuracy", "hsPercent"):
+                if z.get(metric, 0) >= 3.0:
+                    suspicious.append({
+                        "type": "baseline_deviation",
+                        "confidence": round(min(95, z[metric] * 25), 1),
+                        "description": f"{metric} {z[metric]:.1f}σ above own history",
+                        "tick": 0
+                    })
+        
+        fraud_assessments.append({
+            "playerName": player["name"],
+            "fraudProbability": fraud_prob,
+            "aimScore": round(aim_score, 1),
+            "positioningScore": round(min(100, player["kills"] / max(1, player["deaths"]) * 20), 1),
+            "reactionScore": round(min(100, hs_pct * 1.5), 1),
+            "gameSenseScore": round(min(100, player["assists"] * 15), 1),
+            "consistencyScore": round(consistency_score, 1),
+            "suspiciousActivities": suspicious,
+            "riskLevel": risk_level
+        })
+        if baselines is not None:
+            fraud_assessments[-1]["baselineZScores"] = z
+    return fraud_assessments
+
+def score_final(job):
+    job.fraud_assessments = assess_final(job.players)
+
+def score_with_profiles(job):
+    """assess_players, against each player's own history when player_profiles is available"""
+    job.profiles = open_profiles()
+    baselines = None
+    if job.profiles is not None:
+        baselines = job.profiles.baselines(p["steamId"] for p in job.players)
+    job.fraud_assessments = assess_players(job.players, baselines)
+
+# 🔹 Emit stages
+def analysis_result(job):
+    """The `analysis` result returned to the server"""
+    # 🔹 Use REAL map from Go binary or extract from filename
+    map_name = job.parsed.get("map", "Unknown")
+    if map_name == "Unknown":
+        map_name = extract_map_from_filename(job.demo_path)
+
+    return {
+        "success": True,
+        "analysis": {
+            "mapName": map_name,
+            "gameMode": game_mode_for(len(job.players)),
+            "teamAName": "Counter-Terrorists",
+            "teamBName": "Terrorists",
+            "teamAScore": job.parsed.get("teamAScore", 0),
+            "teamBScore": job.parsed.get("teamBScore", 0),
+            "duration": job.parsed.get("duration", 0),
+            "rounds": job.parsed.get("rounds", 0),
+            "players": job.players,
+            "fraudAssessments": job.fraud_assessments,
+            "totalEventsProcessed": job.parsed.get("totalKills", 0),
+        },
+        "sourceFile": os.path.basename(job.demo_path),
+    }
+
+def emit_analysis(job):
+    job.result = analysis_result(job)
+    analysis = job.result["analysis"]
+    log(f"✅ Parsed: {analysis['mapName']}, {analysis['gameMode']}, {len(job.players)} players, "
+        f"score {analysis['teamAScore']}-{analysis['teamBScore']}")
+
+def emit_with_profiles(job):
+    """emit_analysis, then fold the match into the player profile index"""
+    emit_analysis(job)
+    if job.profiles is not None:
+        with job.timing.stage("profiles"):
+            record_profiles(job.profiles, job.demo["sha256"], job)
+        job.profiles = None
+
+def emit_legacy(job):
+    """The original scripts/parse_demo.py shape: raw cs2json players, no scoring"""
+    parsed = job.parsed
+    job.result = {
+        "success": True,
+        "analysis": {
+            "mapName": parsed.get("map") or "Unknown",
+            "gameMode": parsed.get("gameMode") or "5v5",
+            "teamAName": "Team A",
+            "teamBName": "Team B",
+            "teamAScore": parsed.get("teamAScore", 0),
+            "teamBScore": parsed.get("teamBScore", 0),
+            "duration": 0,
+            "players": job.raw_players,
+            "fraudAssessments": [],
+            "totalEventsProcessed": 0
+        },
+        "sourceFile": os.path.basename(job.demo_path),
+    }
+
+# 🔹 Historical per-player baselines (player_profiles.py, optional)
+def open_profiles():
+    if PlayerProfileIndex is None:
+        return None
+    try:
+        return PlayerProfileIndex(profile_db)
+    except Exception as e:
+        log(f"player profiles unavailable: {str(e)}")
+        return None
+
+def record_profiles(profiles, demo_sha256, job):
+    """Fold this match into the index once, keyed by demo content.
+
+    Profiles track the analysis stats; running totals need cs2json's raw
+    counts, since shape_player clamps deaths to 1 and renames damage.
+    """
+    players = [
+        dict(p, deaths=raw.get("deaths", 0), damage=raw.get("damage", 0))
+        for p, raw in zip(job.players, job.raw_players)
+    ]
+    try:
+        if profiles.record_match(demo_sha256, players, os.path.getmtime(job.demo_path)):
+            log(f"player profiles updated: {len(players)} players")
+    except Exception as e:
+        log(f"player profile update failed: {str(e)}")
+    finally:
+        profiles.close()
+
+# 🔹 Cross-match suspicious-moment search index (moment_index.py, optional)
+def open_moment_writer(job):
+    """A MomentWriter for this match, keyed by demo content, or None if the
+    index is unavailable. steamIds are read from `job.raw_players` as it fills.
+    """
+    demo_path = job.demo_path
+    map_name = job.parsed.get("map", "Unknown")
+    if map_name == "Unknown":
+        map_name = extract_map_from_filename(demo_path)
+    try:
+        index = MomentIndex(moment_db)
+    except (OSError, sqlite3.Error) as e:
+        log(f"moment index unavailable: {str(e)}")
+        return None
+    try:
+        return index.writer(
+            demo_hash(demo_path), job.raw_players, map_name, os.path.getmtime(demo_path), os.path.basename(demo_path)
+        )
+    except (OSError, DemoRejected) as e:
+        index.close()
+        log(f"moment index unavailable: {str(e)}")
+        return None
+
+
+def commit_moments(writer):
+    try:
+        added = writer.commit()
+        if added is not None:
+            log(f"moment index updated: {added} moments")
+    except sqlite3.Error as e:
+        log(f"moment index update failed: {str(e)}")
+
+
+# 🔹 Stages of the final pipeline: result cache, dedup, streamed cs2json output
+def cached_preflight(job):
+    """check_inputs, upload dedup and a result-cache lookup keyed by demo content"""
+    check_inputs(job)
+    demo_path = job.demo_path
+    timing = job.timing
+    try:
+        duplicate = None
+        try:
+            with timing.stage("dedup"):
+                job.state["fingerprint"] = partial_fingerprint(demo_path)
+                duplicate = find_duplicate(demo_path, job.state["fingerprint"])
+            if duplicate:
+                saved = link_duplicate(demo_path, duplicate[0])
+                stats = cache_count("dedupBytesSaved", saved)
+                log(f"dedup: {os.path.basename(demo_path)} is {os.path.basename(duplicate[0])}, "
+                    f"linked ({saved} bytes saved, {stats['dedupBytesSaved']} total)")
+        except (OSError, sqlite3.Error) as e:
+            log(f"dedup unavailable: {str(e)}")
+            duplicate = None
+        job.state["duplicate"] = duplicate
+
+        with timing.stage("hash"):
+            key = job.state["cache_key"] = cache_key(demo_hash(demo_path))
+        with timing.stage("cache_lookup"):
+            cached = cache_get(key)
+        stats = cache_count("hits" if cached is not None else "misses")
+        timing.info["cache"] = "hit" if cached is not None else "miss"
+        timing.info["duplicate"] = bool(duplicate)
+        if duplicate and (cached is not None or has_summary(demo_path)):
+            stats = cache_count("dedupCpuSecondsSaved", duplicate[1])
+            log(f"dedup: skipped cs2json ({duplicate[1]:.2f} CPU-s saved, "
+                f"{stats['dedupCpuSecondsSaved']:.2f} total)")
+        if cached is not None:
+            log(f"cache hit: {key[:12]} (hits={stats['hits']}, misses={stats['misses']})")
+            job.result = {
+                "success": True,
+                "analysis": cached,
+                "sourceFile": os.path.basename(demo_path),
+            }
+            if duplicate:
+                job.result["duplicateOf"] = os.path.basename(duplicate[0])
+            else:
+                record_demo(demo_path, job.state["fingerprint"], 0.0)
+            return
+        log(f"cache miss: {key[:12]} (hits={stats['hits']}, misses={stats['misses']})")
+    except OSError as e:
+        log(f"cache unavailable: {str(e)}")
+    job.state["cpu_before"] = cpu_seconds()
+
+def emit_cached(job):
+    """emit_analysis, then store the analysis in the result cache, the match in the
+    player profiles and the demo in the dedup index"""
+    emit_analysis(job)
+    key = job.state.get("cache_key")
+    if key:
+        try:
+            with job.timing.stage("cache_write"):
+                cache_put(key, job.result["analysis"])
+        except OSError as e:
+            log(f"cache write failed: {str(e)}")
+    profiles = open_profiles() if key else None  # key: the demo hashed fine
+    if profiles is not None:
+        with job.timing.stage("profiles"):
+            record_profiles(profiles, demo_hash(job.demo_path), job)
+    duplicate = job.state.get("duplicate")
+    fingerprint = job.state.get("fingerprint")
+    if duplicate:
+        job.result["duplicateOf"] = os.path.basename(duplicate[0])
+    elif fingerprint:
+        record_demo(job.demo_path, fingerprint, cpu_seconds() - job.state["cpu_before"])
+
+def reap(proc):
+    """Wait for cs2json and return its own resource usage (not other children's)"""
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return usage
+
+
+def stream_cs2json(job):
+    """Stream cs2json output (or the stored summary) into the job.
+
+    Players are collected as they are decoded; moments go straight into the
+    moment index in chunks and events into the event timeline, so memory stays
+    flat however long the demo is. cs2json is killed once it exceeds its time
+    budget: `job.timeout` if given, otherwise the adaptive budget for the
+    demo's size (cs2json_budget.py). With `job.on_partial`, cs2json also prints a
+    snapshot after every round and each is passed on as a partial result.
+    """
+    demo_path = job.demo_path
+    timing = job.timing
+    timeout = job.timeout
+    started = time.time()
+    summary = open_summary(demo_path)
+    proc = None
+    timer = None
+    tee = None
+    tmp_summary = None
+    stderr_file = None
+    snapshots = None
+    moments = None
+    timed_out = threading.Event()
+
+    if summary is not None:
+        log(f"Reusing cs2json summary: {summary_path_for(demo_path)}")
+        source = summary
+    else:
+        size = os.path.getsize(demo_path)
+        timeout = time_budget(size, timeout)
+        timing.info["budgetSeconds"] = round(timeout, 1)
+        stderr_file = tempfile.TemporaryFile(mode="w+")
+        spawned = time.perf_counter()
+        with timing.stage("spawn"):
+            proc = subprocess.Popen(
+                [cs2json_path, demo_path],
+                stdout=subprocess.PIPE,
+                stderr=stderr_file,
+                text=True,
+                env={**os.environ, "CS2JSON_SNAPSHOTS": "1"} if job.on_partial else None
+            )
+
+        def kill():
+            timed_out.set()
+            proc.kill()
+            log(f"cs2json killed: {os.path.basename(demo_path)} exceeded its {timeout:.0f}s budget ({size} bytes)")
+            record_kill(demo_path, size, timeout)
+
+        def cs2json_error():
+            stderr_file.seek(0)
+            return ParseError(stderr_file.read().strip())
+
+        timer = threading.Timer(timeout, kill)
+        timer.start()
+        source = proc.stdout
+        if job.on_partial:
+            snapshots = SnapshotReader(
+                source, lambda snapshot: job.on_partial(job.pipeline.partial(demo_path, snapshot))
+            )
+            source = snapshots
+        tmp_summary = f"{summary_path_for(demo_path)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            tee = open(tmp_summary, "w")
+        except OSError as e:
+            log(f"summary write failed: {str(e)}")
+
+    try:
+        stream = SummaryStream(source, tee)
+        timeline_path = event_timeline.timeline_dir_for(demo_path) if event_timeline else None
+        if timeline_path and (proc is not None or not os.path.exists(timeline_path)):
+            stream.events = event_timeline.EventTimelineWriter()
+        try:
+            job.parsed = stream.read_header()
+            check_summary(job.parsed)
+            job.raw_players = []
+            if MomentIndex is not None:
+                stream.moments = moments = open_moment_writer(job)
+            # players() reads the rest of the document once the array is done;
+            # appending one by one lets the moment writer see every steamId
+            for player in stream.players():
+                job.raw_players.append(player)
+        except json.JSONDecodeError:
+            # A dead or killed cs2json explains truncated output better than the decoder
+            if proc is not None:
+                proc.kill()
+                proc.wait()
+                if timed_out.is_set():
+                    raise subprocess.TimeoutExpired(cs2json_path, timeout)
+                if proc.returncode != 0:
+                    raise cs2json_error()
+            raise
+        finally:
+            # cs2json writes its JSON only once parsing is done, so most of its
+            # run time shows up as time blocked reading the pipe
+            partial_seconds = snapshots.callback_seconds if snapshots else 0.0
+            timing.add("cs2json" if proc is not None else "summary_read", stream.read_seconds - partial_seconds)
+            timing.add("decode", stream.decode_seconds)
+            if snapshots:
+                timing.add("partial", partial_seconds)
+                timing.info["snapshots"] = snapshots.snapshots
+
+        if proc is not None:
+            with timing.stage("cs2json"):
+                usage = reap(proc)
+            timing.info["cs2json"] = {
+                "maxRssMB": round(usage.ru_maxrss / 1024, 1),
+                "userSeconds": round(usage.ru_utime, 3),
+                "systemSeconds": round(usage.ru_stime, 3),
+            }
+            if timed_out.is_set():
+                raise subprocess.TimeoutExpired(cs2json_path, timeout)
+            if proc.returncode != 0:
+                raise cs2json_error()
+            record_run(size, time.perf_counter() - spawned)
+            if tee:
+                with timing.stage("summary_write"):
+                    # Drain anything after the document (e.g. the encoder's newline)
+                    tee.write(source.read())
+                    tee.close()
+                    tee = None
+                    os.replace(tmp_summary, summary_path_for(demo_path))
+
+        if stream.events is not None and len(stream.events):
+            try:
+                with timing.stage("timeline_write"):
+                    stream.events.save(timeline_path)
+            except OSError as e:
+                log(f"event timeline write failed: {str(e)}")
+
+        if moments is not None:
+            with timing.stage("moment_index"):
+                commit_moments(moments)
+
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        child_mb = timing.info["cs2json"]["maxRssMB"] if proc is not None else 0.0
+        events = len(stream.events) if stream.events is not None else 0
+        timing.info.update({
+            "players": len(job.raw_players),
+            "moments": stream.moment_count,
+            "events": events,
+            "peakRssMB": round(peak_mb, 1),
+        })
+        log(f"Ingested {len(job.raw_players)} players, {stream.moment_count} moments, "
+            f"{events} events in {time.time() - started:.2f}s (peak RSS {peak_mb:.1f}MB, cs2json {child_mb:.1f}MB)")
+
+    finally:
+        if moments is not None:
+            moments.rollback()
+            moments.index.close()
+        if timer:
+            timer.cancel()
+        if proc is not None and proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        if proc is not None:
+            proc.stdout.close()
+        if summary is not None:
+            summary.close()
+        if stderr_file:
+            stderr_file.close()
+        if tee:
+            tee.close()
+        if tmp_summary and os.path.exists(tmp_summary):
+            os.remove(tmp_summary)
+
+# 🔹 The three parsers
+def final_pipeline():
+    """parse_demo_final.py: streamed cs2json output, result cache, dedup, stored summaries"""
+    return DemoParsePipeline(
+        "final",
+        preflight=cached_preflight,
+        extract=stream_cs2json,
+        normalize=normalize_players,
+        score=score_final,
+        emit=emit_cached,
+    )
+
+def enhanced_pipeline():
+    """parse_demo_enhanced.py: scoring against per-player history baselines"""
+    return DemoParsePipeline(
+        "enhanced",
+        preflight=preflight_demo,
+        extract=run_cs2json,
+        normalize=normalize_estimated,
+        score=score_with_profiles,
+        emit=emit_with_profiles,
+    )
+
+def basic_pipeline():
+    """scripts/parse_demo.py: raw cs2json players in the original result shape"""
+    return DemoParsePipeline("basic", preflight=check_inputs, extract=run_cs2json_unchecked, emit=emit_legacy)
+
+PIPELINES = {"final": final_pipeline, "enhanced": enhanced_pipeline, "basic": basic_pipeline}
+
+# 🔹 Daemon mode: one warm process serving newline-delimited JSON jobs on a Unix socket
+class ParserDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Jobs run through `pipeline` unless they name another one ("pipeline": "enhanced")"""
+    daemon_threads = True
+
+    def __init__(self, path, pipeline, workers=2, max_queue=16):
+        self.pipelines = {name: factory() for name, factory in PIPELINES.items()}
+        self.pipelines[pipeline.name] = pipeline
+        self.default_pipeline = pipeline.name
+        self.jobs = queue.Queue(maxsize=max_queue)
+        self.stats = {"accepted": 0, "rejected": 0, "completed": 0}
+        self.stats_lock = threading.Lock()
+        for _ in range(workers):
+            threading.Thread(target=self.work, daemon=True).start()
+        super().__init__(path, ParserRequestHandler)
+
+    def work(self):
+        while True:
+            request, reply = self.jobs.get()
+            timing = JobTiming(request["demo"])
+            on_partial = (lambda partial: reply.put((partial, None))) if request.get("progressive") else None
+            pipeline = self.pipelines[request.get("pipeline") or self.default_pipeline]
+            try:
+                result = pipeline.run(request["demo"], timing, request.get("timeout"), on_partial)
+            except Exception as e:
+                result = fail(f"Unexpected error: {str(e)}")
+            with self.stats_lock:
+                self.stats["completed"] += 1
+            reply.put((result, timing))
+
+    def submit(self, request):
+        """Queue a job; returns a reply queue, or None when the queue is full
+
+        Progressive jobs put their partial results on the queue ahead of the
+        final (result, timing) pair, so it is unbounded.
+        """
+        reply = queue.Queue()
+        try:
+            self.jobs.put_nowait((request, reply))
+        except queue.Full:
+            with self.stats_lock:
+                self.stats["rejected"] += 1
+            return None
+        with self.stats_lock:
+            self.stats["accepted"] += 1
+        return reply
+
+class ParserRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                self.respond({}, {"success": False, "error": f"Invalid request: {str(e)}"})
+                continue
+
+            if request.get("op") == "ping":
+                with self.server.stats_lock:
+                    stats = dict(self.server.stats)
+                self.respond(request, {"success": True, "queued": self.server.jobs.qsize(), **stats})
+                continue
+
+            if not request.get("demo"):
+                self.respond(request, {"success": False, "error": "No demo file provided"})
+                continue
+
+            if request.get("pipeline") and request["pipeline"] not in self.server.pipelines:
+                self.respond(request, {"success": False, "error": f"Unknown pipeline: {request['pipeline']}"})
+                continue
+
+            reply = self.server.submit(request)
+            if reply is None:
+                # Backpressure: the caller should retry later or fall back to the CLI
+                self.respond(request, {"success": False, "busy": True, "error": "Parser queue full"})
+                continue
+            result, timing = reply.get()
+            while result.get("partial"):
+                self.respond(request, result)
+                result, timing = reply.get()
+            self.respond(request, result, timing)
+
+    def respond(self, request, result, timing=None):
+        if "id" in request:
+            result = {"id": request["id"], **result}
+        started = time.perf_counter()
+        data = (json.dumps(result) + "\n").encode()
+        if timing is not None:
+            timing.add("serialize", time.perf_counter() - started)
+            timing.info["mode"] = "daemon"
+        self.wfile.write(data)
+        self.wfile.flush()
+        if timing is not None:
+            timing.emit(result)
+
+def serve(pipeline, path, workers, max_queue):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.exists(path):
+        # Refuse to steal the socket from a live daemon, but clean up stale ones
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+            probe.close()
+            print(json.dumps({"success": False, "error": f"Parser daemon already running on {path}"}))
+            sys.exit(1)
+        except OSError:
+            os.remove(path)
+
+    server = ParserDaemon(path, pipeline, workers, max_queue)
+    log(f"Parser daemon listening on {path} ({pipeline.name} pipeline, {workers} workers, queue {max_queue})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+# 🔹 Batch mode: re-analyse a directory/glob of demos across a process pool
+def find_demos(pattern):
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "**", "*.dem")
+    return sorted(os.path.abspath(p) for p in glob.glob(pattern, recursive=True) if os.path.isfile(p))
+
+def load_done(out_path):
+    """Demos that already have a successful line in the NDJSON output"""
+    done = set()
+    try:
+        with open(out_path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn last line from an interrupted run
+                if entry.get("success") and entry.get("demo"):
+                    done.add(entry["demo"])
+    except OSError:
+        pass
+    return done
+
+def run_batch(pipeline, pattern, out_path, workers=None):
+    demos = find_demos(pattern)
+    done = load_done(out_path)
+    pending = [d for d in demos if d not in done]
+    workers = workers or os.cpu_count() or 1
+    log(f"Batch: {len(demos)} demos, {len(demos) - len(pending)} already done, {workers} workers")
+
+    started = time.time()
+    processed = failed = 0
+    with open(out_path, "a") as out, ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(pipeline.run, demo): demo for demo in pending}
+        for future in as_completed(futures):
+            demo = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = fail(f"Unexpected error: {str(e)}")
+            processed += 1
+            if not result.get("success"):
+                failed += 1
+            out.write(json.dumps({"demo": demo, **result}) + "\n")
+            out.flush()
+
+        elapsed = time.time() - started
+        summary = {
+            "summary": True,
+            "total": len(demos),
+            "skipped": len(demos) - len(pending),
+            "processed": processed,
+            "failed": failed,
+            "elapsedSeconds": round(elapsed, 2),
+            "demosPerMinute": round(processed / elapsed * 60, 2) if elapsed > 0 else 0.0,
+        }
+        out.write(json.dumps(summary) + "\n")
+
+    log(f"Batch done: {processed} processed, {failed} failed, {summary['demosPerMinute']} demos/min")
+    return summary
+
+
+# 🔹 CLI shared by the parser scripts
+def main(pipeline=None):
+    # --pipeline=<final|enhanced|basic> picks another pipeline (default: the caller's, else final)
+    # --profile=<file.pstats> writes a cProfile dump of a single-demo run
+    # --timeout=<seconds> overrides the adaptive cs2json budget for this job
+    # --progressive prints a partial result line per round before the final one
+    profile_path = None
+    timeout = None
+    on_partial = None
+    for arg in list(sys.argv[1:]):
+        if arg.startswith("--profile="):
+            profile_path = arg.split("=", 1)[1]
+            sys.argv.remove(arg)
+        elif arg.startswith("--timeout="):
+            timeout = float(arg.split("=", 1)[1])
+            sys.argv.remove(arg)
+        elif arg == "--progressive":
+            on_partial = lambda partial: print(json.dumps(partial), flush=True)
+            sys.argv.remove(arg)
+        elif arg.startswith("--pipeline="):
+            name = arg.split("=", 1)[1]
+            if name not in PIPELINES:
+                print(json.dumps({"success": False, "error": f"Unknown pipeline: {name}"}))
+                sys.exit(1)
+            pipeline = PIPELINES[name]()
+            sys.argv.remove(arg)
+    pipeline = pipeline or final_pipeline()
+
+    if len(sys.argv) < 2:
+        print(json.dumps({"success": False, "error": "No demo file provided"}))
+        sys.exit(1)
+
+    if sys.argv[1] == "--daemon":
+        path = sys.argv[2] if len(sys.argv) > 2 else socket_path
+        workers = int(os.environ.get("CS2_PARSER_WORKERS", 2))
+        max_queue = int(os.environ.get("CS2_PARSER_QUEUE", 16))
+        serve(pipeline, path, workers, max_queue)
+        return
+
+    if sys.argv[1] == "--batch":
+        if len(sys.argv) < 4:
+            usage = f"Usage: {os.path.basename(sys.argv[0])} --batch <dir|glob> <out.ndjson> [workers]"
+            print(json.dumps({"success": False, "error": usage}))
+            sys.exit(1)
+        workers = int(sys.argv[4]) if len(sys.argv) > 4 else None
+        print(json.dumps(run_batch(pipeline, sys.argv[2], sys.argv[3], workers)))
+        return
+
+    profiler = cProfile.Profile() if profile_path else None
+    if profiler:
+        profiler.enable()
+    timing = JobTiming(sys.argv[1])
+    result = pipeline.run(sys.argv[1], timing, timeout, on_partial)
+    with timing.stage("serialize"):
+        output = json.dumps(result)
+    timing.info["mode"] = "cli"
+    timing.emit(result)
+    if profiler:
+        profiler.disable()
+        profiler.dump_stats(profile_path)
+        log(f"profile written: {profile_path}")
+    print(output)
+    if not result.get("success"):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
+
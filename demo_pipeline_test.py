@@ -0,0 +1,42 @@
+import io
+import json
+
+import pytest
+
+from demo_pipeline import SummaryStream
+
+SUMMARY = json.dumps({
+    "success": True,
+    "map": "de_mirage",
+    "duration": 1.5e10,
+    "rounds": 22,
+    "players": [
+        {"name": "p0", "steamId": 76561198000000000, "accuracy": 0.125, "kdRatio": -12.25e-3},
+        {"name": "p1", "steamId": 76561198000000001, "accuracy": 0, "kdRatio": 100},
+    ],
+    "totalKills": 150,
+    "suspiciousMoments": [{"playerName": "p0", "confidence": 0.95, "tick_start": 1200}],
+    "events": [{"tick": 64, "damage": 27}],
+})
+
+
+def read_summary(chunk):
+    stream = SummaryStream(io.StringIO(SUMMARY))
+    stream.CHUNK = chunk
+    stream.events = []
+    stream.moments = []
+    fields = stream.read_header()
+    players = list(stream.players())
+    return {**fields, "players": players, "suspiciousMoments": stream.moments, "events": stream.events}
+
+
+@pytest.mark.parametrize("chunk", range(1, 17))
+def test_numbers_split_across_chunks(chunk):
+    assert read_summary(chunk) == json.loads(SUMMARY)
+
+
+def test_number_cut_at_exponent():
+    # The first 9-character chunk ends in "1.5e", which used to decode as 1.5
+    stream = SummaryStream(io.StringIO('{"a":1.5e10,"b":1}'))
+    stream.CHUNK = 9
+    assert stream.read_header() == {"a": 1.5e10, "b": 1}
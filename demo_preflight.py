@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Pre-flight check for uploaded CS2 demos
+Memory-maps the .dem file, validates the PBDEMS2 header and the frame layout
+and computes its SHA-256 in the same sequential pass, so truncated or
+wrong-format uploads are rejected before cs2json spends any CPU on them. The
+hash doubles as the demo's cache/dedup key.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import sys
+import time
+
+DEMO_MAGIC = b"PBDEMS2\0"
+HEADER_SIZE = 16  # magic + int32 fileinfo offset + int32 spawngroups offset
+DEM_STOP = 0
+DEM_FILE_HEADER = 1
+DEM_IS_COMPRESSED = 64
+DEM_MAX_COMMAND = 32  # leaves room for newer EDemoCommands values
+HASH_CHUNK = 4 * 1024 * 1024
+
+
+class DemoRejected(ValueError):
+    pass
+
+
+def read_varint(buf, pos, end):
+    """Decode one protobuf varint (max 32 bits) at `pos`; returns (value, next_pos)"""
+    result = 0
+    shift = 0
+    while pos < end:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+        if shift > 28:
+            raise DemoRejected(f"malformed frame header at byte {pos}")
+    raise DemoRejected("truncated demo: file ends inside a frame header")
+
+
+def preflight(path):
+    """Validate a demo and hash it in one pass.
+
+    Returns {"sha256", "size", "frames", "elapsed"}; raises DemoRejected (with
+    a message suitable for the API response) for anything cs2json would choke on.
+    """
+    started = time.time()
+    size = os.path.getsize(path)
+    if size < HEADER_SIZE:
+        raise DemoRejected(f"not a CS2 demo: file is only {size} bytes")
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        if buf[:8] != DEMO_MAGIC:
+            if buf[:8] == b"HL2DEMO\0":
+                raise DemoRejected("CS:GO (Source 1) demo, only CS2 demos are supported")
+            raise DemoRejected("not a CS2 demo: missing PBDEMS2 header")
+
+        fileinfo_offset = int.from_bytes(buf[8:12], "little")
+        if fileinfo_offset > size:
+            raise DemoRejected(
+                f"truncated demo: header points to byte {fileinfo_offset} but file has {size} bytes"
+            )
+
+        if hasattr(buf, "madvise"):
+            buf.madvise(mmap.MADV_SEQUENTIAL)
+        h = hashlib.sha256()
+        view = memoryview(buf)
+        hashed = 0
+        pos = HEADER_SIZE
+        frames = 0
+        try:
+            while pos < size:
+                frame_start = pos
+                command, pos = read_varint(buf, pos, size)
+                _, pos = read_varint(buf, pos, size)  # tick
+                length, pos = read_varint(buf, pos, size)
+                command &= ~DEM_IS_COMPRESSED
+                if frames == 0 and command != DEM_FILE_HEADER:
+                    raise DemoRejected("corrupt demo: first frame is not a file header")
+                if command > DEM_MAX_COMMAND:
+                    raise DemoRejected(f"corrupt demo: unknown command {command} at byte {frame_start}")
+                pos += length
+                if pos > size:
+                    raise DemoRejected(f"truncated demo: frame at byte {frame_start} runs past end of file")
+                frames += 1
+
+                # Hash whatever the walk has passed, while those pages are still hot
+                while pos - hashed >= HASH_CHUNK:
+                    h.update(view[hashed:hashed + HASH_CHUNK])
+                    hashed += HASH_CHUNK
+            h.update(view[hashed:])
+        finally:
+            view.release()
+
+    if frames == 0:
+        raise DemoRejected("corrupt demo: no frames after header")
+
+    return {
+        "sha256": h.hexdigest(),
+        "size": size,
+        "frames": frames,
+        "elapsed": time.time() - started,
+    }
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(json.dumps({"success": False, "error": "Usage: demo_preflight.py <demo.dem>"}))
+        sys.exit(1)
+    try:
+        info = preflight(sys.argv[1])
+    except (OSError, DemoRejected) as e:
+        print(json.dumps({"success": False, "error": str(e)}))
+        sys.exit(1)
+    print(json.dumps({"success": True, **info}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Compact records for cs2json players and suspicious moments
+A parsed cs2json player is a 17-key dict and a moment an 8-key dict; loading
+tens of thousands of matches for re-scoring or profile building spends most
+of its memory on dict overhead. Two compact forms, both converting losslessly
+to and from the cs2json JSON shape:
+
+- PlayerStats / SuspiciousMoment: one __slots__ object per record
+- PlayerBatch / MomentBatch: struct-of-arrays columns (array.array) with
+  interned string tables, for bulk loads; iterating yields the JSON dicts
+
+fraud_scoring.py --rescore loads stored cs2json summaries into a PlayerBatch;
+benchmarks/records_memory.py measures the bytes per record of each form.
+"""
+
+import sys
+from abc import ABC, abstractmethod
+from array import array
+
+# JSON key -> attribute, in cs2json's field order (PlayerStats in cs2json_final_fixed.go)
+PLAYER_FIELDS = (
+    ("name", "name"),
+    ("steamId", "steam_id"),
+    ("team", "team"),
+    ("kills", "kills"),
+    ("deaths", "deaths"),
+    ("assists", "assists"),
+    ("headshots", "headshots"),
+    ("damage", "damage"),
+    ("damageTaken", "damage_taken"),
+    ("utility", "utility"),
+    ("plants", "plants"),
+    ("defuses", "defuses"),
+    ("weapons", "weapons"),
+    ("accuracy", "accuracy"),
+    ("hsPercent", "hs_percent"),
+    ("kdRatio", "kd_ratio"),
+    ("rating", "rating"),
+)
+
+# SuspiciousMoment in cs2json_final_fixed.go
+MOMENT_FIELDS = (
+    ("playerName", "player_name"),
+    ("team", "team"),
+    ("suspicionType", "suspicion_type"),
+    ("description", "description"),
+    ("confidence", "confidence"),
+    ("tick_start", "tick_start"),
+    ("tick_end", "tick_end"),
+    ("estimatedDuration", "estimated_duration"),
+)
+
+MISSING = object()  # a key absent from the source dict stays absent on the way back
+
+
+class Record:
+    """Base for the __slots__ records: FIELDS maps JSON keys to attributes.
+
+    Keys outside FIELDS are kept in `extra`, so to_json() gives back exactly
+    the dict that from_json() was given.
+    """
+    __slots__ = ("extra",)
+    FIELDS = ()
+
+    @classmethod
+    def from_json(cls, data):
+        record = cls.__new__(cls)
+        for key, attr in cls.FIELDS:
+            setattr(record, attr, data.get(key, MISSING))
+        known = {key for key, _ in cls.FIELDS}
+        record.extra = {k: v for k, v in data.items() if k not in known} or None
+        return record
+
+    def to_json(self):
+        data = {}
+        for key, attr in self.FIELDS:
+            value = getattr(self, attr)
+            if value is not MISSING:
+                data[key] = value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_json()!r})"
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_json() == other.to_json()
+
+
+class PlayerStats(Record):
+    __slots__ = tuple(attr for _, attr in PLAYER_FIELDS)
+    FIELDS = PLAYER_FIELDS
+
+
+class SuspiciousMoment(Record):
+    __slots__ = tuple(attr for _, attr in MOMENT_FIELDS)
+    FIELDS = MOMENT_FIELDS
+
+
+class StringTable:
+    """Interned strings addressed by small integer ids"""
+
+    def __init__(self):
+        self.ids = {}
+        self.values = []
+
+    def __len__(self):
+        return len(self.values)
+
+    def id(self, value):
+        if value not in self.ids:
+            self.ids[value] = len(self.values)
+            self.values.append(sys.intern(value))
+        return self.ids[value]
+
+
+# Largest value each integer typecode holds (all columns are non-negative)
+INT_LIMITS = {"q": 2 ** 63 - 1, "Q": 2 ** 64 - 1}
+
+
+def is_int(value):
+    return type(value) is int
+
+
+def is_number(value):
+    return type(value) in (int, float)
+
+
+class RecordBatch(ABC):
+    """Struct-of-arrays base: one array.array per numeric column.
+
+    A float column remembers per row whether the JSON had an integer there
+    (Go encodes 0.0 as `0`), so values come back with their original type.
+    Rows that don't fit the schema (missing keys, unexpected types, extra
+    keys) are kept as the original dict in `overflow` and returned verbatim.
+    """
+    INT_COLUMNS = ()  # (JSON key, typecode)
+    FLOAT_COLUMNS = ()
+    RECORD = Record
+
+    def __init__(self):
+        self.ints = {key: array(code) for key, code in self.INT_COLUMNS}
+        self.floats = {key: array("d") for key in self.FLOAT_COLUMNS}
+        self.int_floats = array("B")  # bit i set: FLOAT_COLUMNS[i] was a JSON integer
+        self.overflow = {}
+        self.keys = frozenset(key for key, _ in self.RECORD.FIELDS)
+
+    def __len__(self):
+        return len(self.int_floats)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("batch index out of range")
+        if i in self.overflow:
+            return dict(self.overflow[i])
+        data = self.row(i)
+        flags = self.int_floats[i]
+        for bit, key in enumerate(self.FLOAT_COLUMNS):
+            value = self.floats[key][i]
+            data[key] = int(value) if flags & (1 << bit) else value
+        for key, _ in self.INT_COLUMNS:
+            data[key] = self.ints[key][i]
+        return {key: data[key] for key, _ in self.RECORD.FIELDS}
+
+    def record(self, i):
+        """Row `i` as a __slots__ record"""
+        return self.RECORD.from_json(self[i])
+
+    def column(self, key):
+        """The array.array behind a numeric column (np.frombuffer() wraps it without a copy)"""
+        if key in self.ints:
+            return self.ints[key]
+        return self.floats[key]
+
+    @classmethod
+    def from_json(cls, rows):
+        batch = cls()
+        batch.extend(rows)
+        return batch
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def append(self, data):
+        if not self.fits(data):
+            self.append_placeholder()
+            self.overflow[len(self) - 1] = dict(data)
+            return
+        flags = 0
+        for bit, key in enumerate(self.FLOAT_COLUMNS):
+            value = data[key]
+            self.floats[key].append(value)
+            if type(value) is int:
+                flags |= 1 << bit
+        for key, _ in self.INT_COLUMNS:
+            self.ints[key].append(data[key])
+        self.append_row(data)
+        self.int_floats.append(flags)
+
+    def fits(self, data):
+        if data.keys() != self.keys:
+            return False
+        if not all(is_int(data[key]) and 0 <= data[key] <= INT_LIMITS[code] for key, code in self.INT_COLUMNS):
+            return False
+        return all(is_number(data[key]) and not (is_int(data[key]) and abs(data[key]) > 2 ** 53)
+                   for key in self.FLOAT_COLUMNS) and self.fits_row(data)
+
+    def append_placeholder(self):
+        for key in self.FLOAT_COLUMNS:
+            self.floats[key].append(0.0)
+        for key, _ in self.INT_COLUMNS:
+            self.ints[key].append(0)
+        self.append_row(None)
+        self.int_floats.append(0)
+
+    # Subclasses: the non-numeric columns
+    @abstractmethod
+    def fits_row(self, data):
+        """Whether the non-numeric fields of `data` fit the columns"""
+
+    @abstractmethod
+    def append_row(self, data):
+        """Append the non-numeric fields of `data`, or placeholders if None"""
+
+    @abstractmethod
+    def row(self, i):
+        """The non-numeric fields of row `i` as a dict"""
+
+
+class PlayerBatch(RecordBatch):
+    """cs2json players as columns; names stay str, teams/utility/weapons are interned"""
+    INT_COLUMNS = (
+        ("steamId", "Q"),
+        ("kills", "q"),
+        ("deaths", "q"),
+        ("assists", "q"),
+        ("headshots", "q"),
+        ("damage", "q"),
+        ("damageTaken", "q"),
+        ("plants", "q"),
+        ("defuses", "q"),
+    )
+    FLOAT_COLUMNS = ("accuracy", "hsPercent", "kdRatio", "rating")
+    RECORD = PlayerStats
+
+    def __init__(self):
+        super().__init__()
+        self.names = []
+        self.strings = StringTable()  # teams, utility and weapon names
+        self.teams = array("L")
+        # Per row a slice of the flat id/count arrays, delimited by offsets
+        self.utility_offsets = array("L", [0])
+        self.utility = array("L")
+        self.weapon_offsets = array("L", [0])
+        self.weapon_ids = array("L")
+        self.weapon_counts = array("q")
+
+    def fits_row(self, data):
+        if type(data["name"]) is not str or type(data["team"]) is not str:
+            return False
+        utility = data["utility"]
+        if type(utility) is not list or not all(type(u) is str for u in utility):
+            return False
+        weapons = data["weapons"]
+        return type(weapons) is dict and all(
+            type(w) is str and is_int(c) and 0 <= c <= INT_LIMITS["q"] for w, c in weapons.items()
+        )
+
+    def append_row(self, data):
+        if data is None:
+            self.names.append("")
+            self.teams.append(0)
+        else:
+            self.names.append(data["name"])
+            self.teams.append(self.strings.id(data["team"]))
+            self.utility.extend(self.strings.id(u) for u in data["utility"])
+            for weapon, count in data["weapons"].items():
+                self.weapon_ids.append(self.strings.id(weapon))
+                self.weapon_counts.append(count)
+        self.utility_offsets.append(len(self.utility))
+        self.weapon_offsets.append(len(self.weapon_ids))
+
+    def row(self, i):
+        values = self.strings.values
+        start, end = self.weapon_offsets[i], self.weapon_offsets[i + 1]
+        return {
+            "name": self.names[i],
+            "team": values[self.teams[i]],
+            "utility": [values[u] for u in self.utility[self.utility_offsets[i]:self.utility_offsets[i + 1]]],
+            "weapons": {values[w]: c for w, c in zip(self.weapon_ids[start:end], self.weapon_counts[start:end])},
+        }
+
+
+class MomentBatch(RecordBatch):
+    """cs2json suspicious moments as columns; player, team and type names are interned"""
+    INT_COLUMNS = (("tick_start", "q"), ("tick_end", "q"), ("estimatedDuration", "q"))
+    FLOAT_COLUMNS = ("confidence",)
+    RECORD = SuspiciousMoment
+
+    def __init__(self):
+        super().__init__()
+        self.strings = StringTable()
+        self.players = array("L")
+        self.teams = array("L")
+        self.types = array("L")
+        self.descriptions = []
+
+    def fits_row(self, data):
+        return all(type(data[key]) is str for key in ("playerName", "team", "suspicionType", "description"))
+
+    def append_row(self, data):
+        if data is None:
+            self.players.append(0)
+            self.teams.append(0)
+            self.types.append(0)
+            self.descriptions.append("")
+            return
+        self.players.append(self.strings.id(data["playerName"]))
+        self.teams.append(self.strings.id(data["team"]))
+        self.types.append(self.strings.id(data["suspicionType"]))
+        self.descriptions.append(data["description"])
+
+    def row(self, i):
+        values = self.strings.values
+        return {
+            "playerName": values[self.players[i]],
+            "team": values[self.teams[i]],
+            "suspicionType": values[self.types[i]],
+            "description": self.descriptions[i],
+        }
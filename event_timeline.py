@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Per-match kill/damage event timeline stored as tick-sorted NumPy columns
+cs2json's `events` array is written once to <demo>.events/ (one .npy file per
+column plus a small string table), so detectors and clip windowing can pull
+any tick range with a binary search instead of re-parsing the demo.
+"""
+
+import json
+import os
+import shutil
+import sys
+from array import array
+
+import numpy as np
+
+TIMELINE_VERSION = 1
+EVENT_TYPES = ["kill", "damage"]
+
+# column name -> (array.array typecode while collecting, on-disk dtype)
+COLUMNS = {
+    "tick": ("l", np.int32),
+    "type": ("b", np.int8),
+    "attacker": ("l", np.int32),
+    "victim": ("l", np.int32),
+    "weapon": ("l", np.int32),
+    "headshot": ("b", np.bool_),
+    "damage": ("l", np.int32),
+}
+
+
+def timeline_dir_for(demo_path):
+    return f"{demo_path}.events"
+
+
+class EventTimelineWriter:
+    """Collects raw cs2json events into compact columns, interning names"""
+
+    def __init__(self):
+        self.columns = {name: array(code) for name, (code, _) in COLUMNS.items()}
+        self.strings = {"players": {}, "weapons": {}}
+
+    def __len__(self):
+        return len(self.columns["tick"])
+
+    def intern(self, table, value):
+        ids = self.strings[table]
+        if value not in ids:
+            ids[value] = len(ids)
+        return ids[value]
+
+    def append(self, event):
+        kind = event.get("type")
+        if kind not in EVENT_TYPES:
+            return
+        cols = self.columns
+        cols["tick"].append(int(event.get("tick", 0)))
+        cols["type"].append(EVENT_TYPES.index(kind))
+        cols["attacker"].append(self.intern("players", event.get("attacker", "Unknown")))
+        cols["victim"].append(self.intern("players", event.get("victim", "Unknown")))
+        cols["weapon"].append(self.intern("weapons", event.get("weapon", "Unknown")))
+        cols["headshot"].append(1 if event.get("headshot") else 0)
+        cols["damage"].append(int(event.get("damage", 0)))
+
+    def save(self, path):
+        """Write the tick-sorted columns to `path`, replacing any previous timeline"""
+        order = np.argsort(np.array(self.columns["tick"], dtype=np.int64), kind="stable")
+
+        tmp = f"{path}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for name, (_, dtype) in COLUMNS.items():
+            values = np.array(self.columns[name], dtype=dtype)[order]
+            np.save(os.path.join(tmp, f"{name}.npy"), values)
+        with open(os.path.join(tmp, "strings.json"), "w") as f:
+            json.dump({
+                "version": TIMELINE_VERSION,
+                "types": EVENT_TYPES,
+                "players": list(self.strings["players"]),
+                "weapons": list(self.strings["weapons"]),
+            }, f)
+
+        # Directories can't be os.replace()d over a non-empty target
+        old = f"{path}.{os.getpid()}.old"
+        if os.path.exists(path):
+            os.replace(path, old)
+        os.replace(tmp, path)
+        shutil.rmtree(old, ignore_errors=True)
+
+
+class EventTimeline:
+    """Read-only view of a stored timeline; columns are memory-mapped"""
+
+    def __init__(self, path):
+        with open(os.path.join(path, "strings.json")) as f:
+            strings = json.load(f)
+        if strings.get("version") != TIMELINE_VERSION:
+            raise ValueError(f"unsupported timeline version: {strings.get('version')}")
+        self.types = strings["types"]
+        self.players = strings["players"]
+        self.weapons = strings["weapons"]
+        self.columns = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+            for name in COLUMNS
+        }
+        self.player_ids = {name: i for i, name in enumerate(self.players)}
+
+    def __len__(self):
+        return len(self.columns["tick"])
+
+    def span(self, tick_start, tick_end):
+        """(lo, hi) row bounds of events with tick_start <= tick <= tick_end"""
+        ticks = self.columns["tick"]
+        lo = int(np.searchsorted(ticks, tick_start, side="left"))
+        hi = int(np.searchsorted(ticks, tick_end, side="right"))
+        return lo, hi
+
+    def select(self, tick_start, tick_end, kind=None, player=None):
+        """Row indexes in the tick range, optionally filtered by type and player"""
+        lo, hi = self.span(tick_start, tick_end)
+        mask = np.ones(hi - lo, dtype=bool)
+        if kind is not None:
+            mask &= self.columns["type"][lo:hi] == self.types.index(kind)
+        if player is not None:
+            pid = self.player_ids.get(player, -1)
+            mask &= (self.columns["attacker"][lo:hi] == pid) | (self.columns["victim"][lo:hi] == pid)
+        return lo + np.flatnonzero(mask)
+
+    def events(self, tick_start, tick_end, kind=None, player=None):
+        """Events in the tick range as cs2json-shaped dicts"""
+        cols = self.columns
+        return [
+            {
+                "tick": int(cols["tick"][i]),
+                "type": self.types[cols["type"][i]],
+                "attacker": self.players[cols["attacker"][i]],
+                "victim": self.players[cols["victim"][i]],
+                "weapon": self.weapons[cols["weapon"][i]],
+                "headshot": bool(cols["headshot"][i]),
+                "damage": int(cols["damage"][i]),
+            }
+            for i in self.select(tick_start, tick_end, kind, player).tolist()
+        ]
+
+
+def open_timeline(demo_path):
+    """Stored timeline for a demo, or None if missing/stale"""
+    path = timeline_dir_for(demo_path)
+    try:
+        if os.path.getmtime(os.path.join(path, "strings.json")) < os.path.getmtime(demo_path):
+            return None
+        return EventTimeline(path)
+    except (OSError, ValueError):
+        return None
+
+
+def build_from_summary(demo_path):
+    """Rebuild a demo's timeline from its stored cs2json summary"""
+    from demo_pipeline import SummaryStream, summary_path_for
+
+    writer = EventTimelineWriter()
+    with open(summary_path_for(demo_path)) as f:
+        stream = SummaryStream(f)
+        stream.events = writer
+        stream.read_header()
+        for _ in stream.players():
+            pass
+    writer.save(timeline_dir_for(demo_path))
+    return len(writer)
+
+
+def main():
+    usage = "Usage: event_timeline.py build <demo> | query <demo> <tick_start> <tick_end> [kill|damage] [player]"
+    if len(sys.argv) < 3 or sys.argv[1] not in ("build", "query"):
+        print(json.dumps({"success": False, "error": usage}))
+        sys.exit(1)
+
+    demo_path = sys.argv[2]
+    if sys.argv[1] == "build":
+        try:
+            count = build_from_summary(demo_path)
+        except (OSError, json.JSONDecodeError) as e:
+            print(json.dumps({"success": False, "error": f"Failed to build timeline: {str(e)}"}))
+            sys.exit(1)
+        print(json.dumps({"success": True, "events": count, "path": timeline_dir_for(demo_path)}))
+        return
+
+    if len(sys.argv) < 5:
+        print(json.dumps({"success": False, "error": usage}))
+        sys.exit(1)
+    timeline = open_timeline(demo_path)
+    if timeline is None:
+        print(json.dumps({"success": False, "error": f"No event timeline for {demo_path}"}))
+        sys.exit(1)
+    kind = sys.argv[5] if len(sys.argv) > 5 else None
+    if kind is not None and kind not in timeline.types:
+        print(json.dumps({"success": False, "error": f"Unknown event type: {kind}"}))
+        sys.exit(1)
+    player = sys.argv[6] if len(sys.argv) > 6 else None
+    print(json.dumps({
+        "success": True,
+        "events": timeline.events(int(sys.argv[3]), int(sys.argv[4]), kind, player),
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Columnar fraud scoring for bulk re-scoring jobs
+Computes parse_demo_enhanced.py's fraudAssessments for every player of many
+matches at once with NumPy, producing the exact same structure as the
+per-player loop (demo_pipeline.assess_players), which stays the reference
+implementation.
+--rescore applies a threshold config to stored results, or to stored cs2json
+summaries (<demo>.summary.json, loaded into a compact PlayerBatch), and reports
+which players' risk level would change, without touching cs2json or the demos.
+"""
+
+import json
+import sys
+
+import numpy as np
+
+from demo_pipeline import assess_players, shape_player
+from demo_records import PlayerBatch
+
+RISK_LEVELS = np.array(["low", "medium", "high", "critical"])
+
+# The rules hard-coded in assess_players(); a --rescore config overrides any subset
+DEFAULT_THRESHOLDS = {
+    "fraudRules": {
+        "accuracy": {"above": 0.55, "points": 25},
+        "hsPercent": {"above": 50, "points": 30},
+        "kdRatio": {"above": 3.0, "points": 15},
+    },
+    "riskLevels": {"medium": 30, "high": 50, "critical": 70},
+    "flags": {
+        "unusual_accuracy": 0.50,
+        "high_headshot_rate": 45,
+        "high_kd_ratio": 2.5,
+        "high_kill_count": 30,
+    },
+}
+
+
+def merge_thresholds(overrides, defaults=DEFAULT_THRESHOLDS, where="thresholds"):
+    """Defaults with `overrides` applied, rejecting keys the scorer doesn't know"""
+    merged = {}
+    for key, default in defaults.items():
+        value = overrides.get(key, default)
+        if isinstance(default, dict):
+            if not isinstance(value, dict):
+                raise ValueError(f"{where}.{key} must be an object")
+            value = merge_thresholds(value, default, f"{where}.{key}")
+        elif not isinstance(value, (int, float)) or isinstance(value, bool):
+            raise ValueError(f"{where}.{key} must be a number")
+        merged[key] = value
+    unknown = set(overrides) - set(defaults)
+    if unknown:
+        raise ValueError(f"unknown keys in {where}: {', '.join(sorted(unknown))}")
+    return merged
+
+
+def load_thresholds(path):
+    with open(path) as f:
+        return merge_thresholds(json.load(f))
+
+
+def load_columns(matches):
+    """Flatten the `players` lists of many matches into one set of arrays"""
+    players = [p for match in matches for p in match]
+    offsets = np.cumsum([0] + [len(match) for match in matches])
+
+    def numeric(value):
+        return value if isinstance(value, (int, float)) else 0.0
+
+    return {
+        "offsets": offsets,
+        "name": [p["name"] for p in players],
+        "steamId": [str(p.get("steamId", "0")) for p in players],
+        "accuracy": np.array([numeric(p["accuracy"]) for p in players], dtype=np.float64),
+        "hsPercent": np.array([p["hsPercent"] for p in players], dtype=np.float64),
+        "kdRatio": np.array([p["kdRatio"] for p in players], dtype=np.float64),
+        "kills": np.array([p["kills"] for p in players], dtype=np.int64),
+        "deaths": np.array([p["deaths"] for p in players], dtype=np.int64),
+        "assists": np.array([p["assists"] for p in players], dtype=np.int64),
+    }
+
+
+def batch_columns(batch, offsets):
+    """load_columns() for raw cs2json players in a PlayerBatch, derived the way
+    shape_player() shapes them; the count columns are wrapped without a copy.
+    """
+    def column(key):
+        values = np.frombuffer(batch.column(key), dtype=batch.column(key).typecode)
+        # Rows that didn't fit the batch hold zeros there; they are patched below
+        return values.astype(np.int64) if batch.overflow else values
+
+    kills = column("kills")
+    deaths = np.maximum(column("deaths"), 1)
+    kill_list = kills.tolist()
+    cols = {
+        "offsets": np.array(offsets),
+        "name": list(batch.names),
+        "steamId": [str(s) for s in batch.column("steamId")],
+        "accuracy": np.array([round(a, 2) for a in batch.column("accuracy")], dtype=np.float64),
+        "hsPercent": np.array([round(h / k * 100, 1) if k > 0 else 0.0
+                               for h, k in zip(batch.column("headshots"), kill_list)], dtype=np.float64),
+        "kdRatio": np.array([round(k / d, 2) for k, d in zip(kill_list, deaths.tolist())], dtype=np.float64),
+        "kills": kills,
+        "deaths": deaths,
+        "assists": column("assists"),
+    }
+    for i, raw in batch.overflow.items():
+        shaped = load_columns([[shape_player(raw)]])
+        for key, values in shaped.items():
+            if key != "offsets":
+                cols[key][i] = values[0]
+    return cols
+
+
+def score_columns(cols, thresholds=DEFAULT_THRESHOLDS):
+    """Every score, threshold flag and confidence for all players, unrounded"""
+    acc = cols["accuracy"]
+    hs = cols["hsPercent"]
+    kd = cols["kdRatio"]
+    kills = cols["kills"]
+    rules = thresholds["fraudRules"]
+    levels = thresholds["riskLevels"]
+    flags = thresholds["flags"]
+
+    fraud_prob = np.zeros(len(acc))
+    for metric, rule in rules.items():
+        fraud_prob += np.where(cols[metric] > rule["above"], float(rule["points"]), 0.0)
+    fraud_prob = np.clip(fraud_prob, 0, 100)
+    risk = (
+        (fraud_prob >= levels["medium"]).astype(np.int8)
+        + (fraud_prob >= levels["high"])
+        + (fraud_prob >= levels["critical"])
+    )
+
+    return {
+        "fraudProbability": fraud_prob,
+        "riskLevel": RISK_LEVELS[risk],
+        "aimScore": (acc * 100 + hs) / 2,
+        "positioningScore": kills / np.maximum(1, cols["deaths"]) * 20,
+        "reactionScore": hs * 1.5,
+        "gameSenseScore": cols["assists"] * 15,
+        "consistencyScore": kd * 30,
+        "flags": {
+            "unusual_accuracy": (acc > flags["unusual_accuracy"], acc * 150, 95),
+            "high_headshot_rate": (hs > flags["high_headshot_rate"], hs * 1.5, 95),
+            "high_kd_ratio": (kd > flags["high_kd_ratio"], kd * 25, 95),
+            "high_kill_count": (kills > flags["high_kill_count"], kills / 50 * 100, 90),
+        },
+    }
+
+
+def round1(raw):
+    """Python's round(x, 1) for a float array, as a list of floats.
+
+    np.round agrees with the correctly rounded result except right at a .x5
+    tie, where x * 10 may land on the wrong side; those few fall back to round().
+    """
+    scaled = raw * 10
+    rounded = (np.rint(scaled) / 10).tolist()
+    for i in np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6).tolist():
+        rounded[i] = round(float(raw[i]), 1)
+    return rounded
+
+
+def capped(raw, cap):
+    """round(min(cap, x), 1) per element, keeping Python's int result at the cap"""
+    values = round1(raw)
+    for i in np.flatnonzero(raw >= cap).tolist():
+        values[i] = cap
+    return values
+
+
+def assess_matches(matches, thresholds=DEFAULT_THRESHOLDS):
+    """fraudAssessments for each match, identical to assess_players() per match"""
+    cols = load_columns(matches)
+    scores = score_columns(cols, thresholds)
+    n = len(cols["name"])
+
+    suspicious = [[] for _ in range(n)]
+    acc = cols["accuracy"].tolist()
+    hs = cols["hsPercent"].tolist()
+    kd = cols["kdRatio"].tolist()
+    kills = cols["kills"].tolist()
+    describe = {
+        "unusual_accuracy": lambda i: f"High accuracy: {acc[i]*100:.1f}%",
+        "high_headshot_rate": lambda i: f"High HS rate: {hs[i]:.1f}%",
+        "high_kd_ratio": lambda i: f"High K/D: {kd[i]:.2f}",
+        "high_kill_count": lambda i: f"Very high kills: {kills[i]}",
+    }
+    for kind, (mask, confidence, cap) in scores["flags"].items():
+        flagged = np.flatnonzero(mask)
+        for i, c in zip(flagged.tolist(), capped(confidence[flagged].astype(np.float64), cap)):
+            suspicious[i].append({
+                "type": kind,
+                "confidence": c,
+                "description": describe[kind](i),
+                "tick": 0
+            })
+
+    fraud_prob = [v if v else 0 for v in scores["fraudProbability"].tolist()]
+    aim = capped(scores["aimScore"], 100)
+    positioning = capped(scores["positioningScore"], 100)
+    reaction = capped(scores["reactionScore"], 100)
+    game_sense = [min(100, v) for v in scores["gameSenseScore"].tolist()]
+    consistency = capped(scores["consistencyScore"], 100)
+    risk = scores["riskLevel"].tolist()
+
+    assessments = [
+        {
+            "playerName": cols["name"][i],
+            "fraudProbability": fraud_prob[i],
+            "aimScore": aim[i],
+            "positioningScore": positioning[i],
+            "reactionScore": reaction[i],
+            "gameSenseScore": game_sense[i],
+            "consistencyScore": consistency[i],
+            "suspiciousActivities": suspicious[i],
+            "riskLevel": risk[i]
+        }
+        for i in range(n)
+    ]
+    offsets = cols["offsets"].tolist()
+    return [assessments[offsets[m]:offsets[m + 1]] for m in range(len(matches))]
+
+
+def check_parity(matches):
+    """Indexes of matches whose vectorized output differs from the per-player loop"""
+    vectorized = assess_matches(matches)
+    # json.dumps keeps int/float distinctions (100 vs 100.0) that == would hide
+    return [
+        m for m, match in enumerate(matches)
+        if json.dumps(vectorized[m]) != json.dumps(assess_players(match))
+    ]
+
+
+def rescore(labels, cols, thresholds):
+    """Risk-level changes when stored matches are re-scored with `thresholds`.
+
+    `cols` holds the players of matches `labels` (load_columns/batch_columns).
+    Both sides come from score_columns, "before" at DEFAULT_THRESHOLDS, so the
+    diff reflects only the threshold change. Stored fraudAssessments are not
+    used: final-pipeline results (uploads, --batch) were scored by
+    assess_final, whose rules differ from the enhanced ones mirrored here.
+    """
+    after = score_columns(cols, thresholds)
+    before = score_columns(cols, DEFAULT_THRESHOLDS)
+    before_probability = before["fraudProbability"]
+    before_risk = before["riskLevel"]
+
+    match_of = np.repeat(np.arange(len(labels)), np.diff(cols["offsets"]))
+    changes = []
+    for i in np.flatnonzero(before_risk != after["riskLevel"]).tolist():
+        changes.append({
+            "match": labels[int(match_of[i])],
+            "playerName": cols["name"][i],
+            "steamId": cols["steamId"][i],
+            "before": {"riskLevel": str(before_risk[i]), "fraudProbability": float(before_probability[i])},
+            "after": {"riskLevel": str(after["riskLevel"][i]), "fraudProbability": float(after["fraudProbability"][i])},
+        })
+    return changes
+
+
+def read_analyses(paths):
+    """(label, analysis) pairs from parser outputs: single JSON results or batch NDJSON"""
+    analyses = []
+    for path in paths:
+        with open(path) as f:
+            for lineno, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                entry = json.loads(line)
+                analysis = entry.get("analysis")
+                if entry.get("success") and analysis:
+                    label = entry.get("demo") or entry.get("sourceFile") or f"{path}:{lineno}"
+                    analyses.append((label, analysis))
+    return analyses
+
+
+def read_summaries(paths):
+    """Players of stored cs2json summaries as one PlayerBatch.
+
+    Returns (labels, batch, offsets); match m is rows offsets[m]:offsets[m + 1].
+    """
+    labels, batch, offsets = [], PlayerBatch(), [0]
+    for path in paths:
+        with open(path) as f:
+            batch.extend(json.load(f).get("players") or [])
+        labels.append(path[:-len(".summary.json")])
+        offsets.append(len(batch))
+    return labels, batch, offsets
+
+
+def read_matches(paths):
+    """`players` arrays from parser outputs: single JSON results or batch NDJSON"""
+    return [analysis.get("players", []) for _, analysis in read_analyses(paths)]
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(json.dumps({
+            "success": False,
+            "error": "Usage: fraud_scoring.py [--parity | --rescore <thresholds.json>] <results.ndjson> [...]"
+        }))
+        sys.exit(1)
+
+    if sys.argv[1] == "--rescore":
+        if len(sys.argv) < 4:
+            print(json.dumps({
+                "success": False,
+                "error": "Usage: fraud_scoring.py --rescore <thresholds.json> "
+                         "(<results.ndjson> | <demo>.summary.json) [...]"
+            }))
+            sys.exit(1)
+        try:
+            thresholds = load_thresholds(sys.argv[2])
+        except (OSError, ValueError) as e:
+            print(json.dumps({"success": False, "error": f"Invalid threshold config: {str(e)}"}))
+            sys.exit(1)
+        paths = sys.argv[3:]
+        summaries = [p for p in paths if p.endswith(".summary.json")]
+        if summaries and len(summaries) != len(paths):
+            print(json.dumps({"success": False, "error": "--rescore takes either parser results or cs2json summaries"}))
+            sys.exit(1)
+        if summaries:
+            labels, batch, offsets = read_summaries(summaries)
+            cols = batch_columns(batch, offsets)
+        else:
+            analyses = read_analyses(paths)
+            labels = [label for label, _ in analyses]
+            cols = load_columns([analysis.get("players", []) for _, analysis in analyses])
+        changes = rescore(labels, cols, thresholds)
+        transitions = {}
+        for change in changes:
+            key = f"{change['before']['riskLevel']}->{change['after']['riskLevel']}"
+            transitions[key] = transitions.get(key, 0) + 1
+        print(json.dumps({
+            "success": True,
+            "matches": len(labels),
+            "players": len(cols["name"]),
+            "changed": len(changes),
+            "transitions": transitions,
+            "changes": changes,
+        }))
+        return
+
+    parity = sys.argv[1] == "--parity"
+    matches = read_matches(sys.argv[2:] if parity else sys.argv[1:])
+
+    if parity:
+        mismatches = check_parity(matches)
+        print(json.dumps({
+            "success": not mismatches,
+            "matches": len(matches),
+            "players": sum(len(m) for m in matches),
+            "mismatches": mismatches,
+        }))
+        sys.exit(1 if mismatches else 0)
+
+    for assessments in assess_matches(matches):
+        print(json.dumps({"fraudAssessments": assessments}))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 Clip Generation Script for CS2 Demo Analysis
-Generates MP4 clips (1080p 60fps) from suspicious moments detected in demo files
+Generates MP4 clips (1080p 60fps by default) from suspicious moments detected in demo files
 """
 
 import json
@@ -10,50 +10,264 @@ import sys
 import os
 import time
 import random
+import hashlib
 import logging
+import threading
+import fcntl
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
-# Setup logging
-log_path = "/var/www/cs2-analysis/logs/clip_generation.log"
-os.makedirs(os.path.dirname(log_path), exist_ok=True)
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_path),
-        logging.StreamHandler()
-    ]
-)
+from cs2json_budget import time_budget, record_run, record_kill
+from demo_pipeline import summary_path_for
+from moment_selection import top_moments
+
+log_path = os.environ.get("CS2_CLIP_LOG", "/var/www/cs2-analysis/logs/clip_generation.log")
 logger = logging.getLogger(__name__)
 
+def setup_logging(path=None):
+    """File + console logging for CLI runs; importing this module configures none"""
+    path = path or log_path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(path),
+            logging.StreamHandler()
+        ]
+    )
+
+CS2JSON_PATH = "/var/www/cs2-analysis/scripts/cs2json"
+FFMPEG_THREADS = 2  # libx264 threads per clip when rendering concurrently
+MANIFEST_NAME = "manifest.json"
+# Rendered clips of one match kept on disk, whether selected or not, so other
+# sensitivities / clip counts reuse them; least recently rendered go first
+CLIPS_MAX_BYTES = int(os.environ.get("CS2_CLIPS_MAX_BYTES", 2 * 1024 * 1024 * 1024))
+RENDER_MODES = ("per_clip", "single_pass")
+
+# Named encode settings, cheapest first; "archive" is the original 1080p60 output
+RENDER_PROFILES = {
+    "preview": {"resolution": "1280x720", "fps": 30, "preset": "veryfast", "crf": 26},
+    "review": {"resolution": "1920x1080", "fps": 30, "preset": "faster", "crf": 22},
+    "archive": {"resolution": "1920x1080", "fps": 60, "preset": "medium", "crf": 18},
+}
+PROFILE_RANK = {name: rank for rank, name in enumerate(RENDER_PROFILES)}
+
+
+def default_workers(ffmpeg_threads=FFMPEG_THREADS):
+    """One render worker per ffmpeg_threads cores"""
+    return max(1, (os.cpu_count() or 1) // max(1, ffmpeg_threads))
+
+
+class ProgressWriter:
+    """Append-only NDJSON progress events for job mode, safe across worker threads"""
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    
+    def __call__(self, event, **fields):
+        line = json.dumps({"event": event, "ts": datetime.now().isoformat(), **fields})
+        with self.lock:
+            with open(self.path, "a") as f:
+                f.write(line + "\n")
+
+
 class ClipGenerator:
-    def __init__(self, demo_path, output_dir, match_id, sensitivity=3):
+    def __init__(self, demo_path, output_dir, match_id, sensitivity=3, workers=None, ffmpeg_threads=FFMPEG_THREADS, render_mode="per_clip", profile="archive", progress=None, cs2json_timeout=None):
         self.demo_path = demo_path
         self.output_dir = output_dir
         self.match_id = match_id
         self.sensitivity = sensitivity  # 1-5 scale
+        self.ffmpeg_threads = max(1, ffmpeg_threads)
+        self.workers = max(1, workers) if workers else default_workers(self.ffmpeg_threads)
+        self.render_mode = render_mode if render_mode in RENDER_MODES else "per_clip"
+        self.profile = profile if profile in RENDER_PROFILES else "archive"
+        self.progress = progress  # callable(event, **fields), e.g. ProgressWriter
+        self.cs2json_timeout = cs2json_timeout  # None: adaptive budget from demo size
         self.clips_dir = Path(output_dir) / str(match_id)
         self.clips_dir.mkdir(parents=True, exist_ok=True)
         self.generated_clips = []
+        self.manifest_path = self.clips_dir / MANIFEST_NAME
+        self.manifest_lock = threading.Lock()
+        self.manifest = self.load_manifest()
         
-    def get_suspicious_moments(self):
-        """Extract suspicious moments from demo using cs2json binary"""
+    def emit(self, event, **fields):
+        if self.progress:
+            try:
+                self.progress(event, **fields)
+            except Exception as e:
+                logger.warning(f"Progress update failed: {str(e)}")
+    
+    def load_manifest(self):
+        """Per-match record of rendered clips: fingerprint -> params, file, size"""
         try:
-            logger.info(f"Analyzing demo: {self.demo_path}")
-            result = subprocess.run(
-                ["/var/www/cs2-analysis/scripts/cs2json", self.demo_path],
-                capture_output=True,
-                text=True,
-                timeout=300
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+            if isinstance(manifest.get("clips"), dict):
+                return manifest
+        except (OSError, ValueError):
+            pass
+        return {"matchId": str(self.match_id), "clips": {}}
+    
+    @contextlib.contextmanager
+    def updating_manifest(self):
+        """Read-modify-write of manifest.json under an exclusive flock: a preview
+        run and its detached archive render update the same match's manifest"""
+        with self.manifest_lock:
+            with open(self.clips_dir / f"{MANIFEST_NAME}.lock", "a") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                self.manifest = self.load_manifest()
+                yield self.manifest["clips"]
+                tmp = self.manifest_path.with_name(f"{MANIFEST_NAME}.{os.getpid()}.{threading.get_ident()}.tmp")
+                with open(tmp, "w") as f:
+                    json.dump(self.manifest, f, indent=2)
+                os.replace(tmp, self.manifest_path)
+    
+    @staticmethod
+    def moment_fingerprint(moment):
+        """Stable identity of a moment, independent of its rank in a selection"""
+        key = json.dumps([
+            moment.get("playerName"),
+            moment.get("suspicionType"),
+            moment.get("tick_start", 0),
+            moment.get("tick_end", 0),
+            moment.get("description"),
+            moment.get("confidence", 0),
+        ])
+        return hashlib.sha1(key.encode()).hexdigest()[:16]
+    
+    def clip_key(self, moment, profile=None):
+        """Manifest key and file stem: the fingerprint, tagged for non-archive profiles"""
+        profile = profile or self.profile
+        fingerprint = self.moment_fingerprint(moment)
+        return fingerprint if profile == "archive" else f"{fingerprint}-{profile}"
+    
+    def render_params(self, moment, profile=None):
+        """Everything besides the moment itself that affects the encoded output"""
+        return {
+            "duration": self.calculate_clip_duration(moment),
+            **RENDER_PROFILES[profile or self.profile],
+        }
+    
+    def best_cached_clip(self, moment):
+        """Cached clip at this profile or any higher-quality one"""
+        for profile, rank in PROFILE_RANK.items():
+            if rank >= PROFILE_RANK[self.profile]:
+                cached = self.cached_clip(self.clip_key(moment, profile), self.render_params(moment, profile))
+                if cached:
+                    return cached
+        return None
+    
+    def cached_clip(self, key, params):
+        """Manifest entry for an already rendered, unchanged clip, else None"""
+        entry = self.manifest["clips"].get(key)
+        if not entry or entry.get("params") != params:
+            return None
+        try:
+            if os.path.getsize(entry["file"]) != entry["size"]:
+                return None
+        except OSError:
+            return None
+        return entry
+    
+    def record_clip(self, moment, params, clip_info):
+        """Add a rendered clip; lower-quality renders of the same moment stay on
+        disk (clients may hold their paths) and point at it via supersededBy"""
+        key = self.clip_key(moment)
+        fingerprint = self.moment_fingerprint(moment)
+        rank = PROFILE_RANK[self.profile]
+        with self.updating_manifest() as clips:
+            clips[key] = {
+                **clip_info,
+                "fingerprint": fingerprint,
+                "profile": self.profile,
+                "params": params,
+                "renderedAt": datetime.now().isoformat(),
+            }
+            for other, entry in clips.items():
+                if entry.get("fingerprint", other) == fingerprint and PROFILE_RANK.get(entry.get("profile", "archive"), 0) < rank:
+                    entry["supersededBy"] = key
+    
+    def prune_clips(self, keep, max_bytes=CLIPS_MAX_BYTES):
+        """Keep the match's clips within `max_bytes`: clips outside the selection
+        and superseded lower-quality renders stay for later selections and
+        clients until then, and are deleted least recently rendered first."""
+        with self.updating_manifest() as clips:
+            total = sum(entry.get("size", 0) for entry in clips.values())
+            evictable = sorted(
+                (key for key, entry in clips.items()
+                 if entry.get("fingerprint", key) not in keep or entry.get("supersededBy") in clips),
+                key=lambda key: clips[key].get("renderedAt", ""),
             )
+            for key in evictable:
+                if total <= max_bytes:
+                    break
+                entry = clips.pop(key)
+                total -= entry.get("size", 0)
+                try:
+                    os.remove(entry["file"])
+                except OSError:
+                    pass
+    
+    def load_summary(self):
+        """Load the shared cs2json summary if it is newer than the demo and binary"""
+        summary = summary_path_for(self.demo_path)
+        try:
+            mtime = os.path.getmtime(summary)
+            if mtime < os.path.getmtime(self.demo_path) or mtime < os.path.getmtime(CS2JSON_PATH):
+                logger.info(f"Stale cs2json summary ignored: {summary}")
+                return None
+            with open(summary) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save_summary(self, raw):
+        summary = summary_path_for(self.demo_path)
+        try:
+            tmp = f"{summary}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                f.write(raw)
+            os.replace(tmp, summary)
+        except OSError as e:
+            logger.warning(f"Could not persist cs2json summary: {str(e)}")
+
+    def get_suspicious_moments(self):
+        """Extract suspicious moments from the shared summary, running cs2json only if missing"""
+        try:
+            data = self.load_summary()
+            if data is not None:
+                logger.info(f"Using cached cs2json summary for: {self.demo_path}")
+            else:
+                logger.info(f"Analyzing demo: {self.demo_path}")
+                size = os.path.getsize(self.demo_path)
+                budget = time_budget(size, self.cs2json_timeout)
+                started = time.perf_counter()
+                try:
+                    result = subprocess.run(
+                        [CS2JSON_PATH, self.demo_path],
+                        capture_output=True,
+                        text=True,
+                        timeout=budget
+                    )
+                except subprocess.TimeoutExpired:
+                    logger.error(f"cs2json killed after its {budget:.0f}s budget ({size} bytes)")
+                    record_kill(self.demo_path, size, budget)
+                    return []
+                
+                if result.returncode != 0:
+                    logger.error(f"cs2json failed: {result.stderr}")
+                    return []
+                
+                data = json.loads(result.stdout)
+                if data.get("success"):
+                    record_run(size, time.perf_counter() - started)
+                    self.save_summary(result.stdout.strip())
             
-            if result.returncode != 0:
-                logger.error(f"cs2json failed: {result.stderr}")
-                return []
-            
-            data = json.loads(result.stdout)
-            moments = data.get("suspiciousMoments", [])
+            moments = data.get("suspiciousMoments") or []
             logger.info(f"Found {len(moments)} suspicious moments")
             return moments
             
@@ -62,44 +276,11 @@ class ClipGenerator:
             return []
     
     def filter_moments_by_sensitivity(self, moments, num_clips):
-        """Filter moments based on sensitivity level and confidence"""
+        """Best `num_clips` moments above this sensitivity's confidence threshold,
+        by type priority then confidence (moment_selection.py)"""
         if not moments:
             return []
-        
-        # Sensitivity affects minimum confidence threshold and moment selection
-        sensitivity_thresholds = {
-            1: 0.90,  # Only very obvious moments
-            2: 0.85,
-            3: 0.80,
-            4: 0.75,
-            5: 0.50   # Everything, even subtle moments
-        }
-        
-        threshold = sensitivity_thresholds.get(self.sensitivity, 0.80)
-        
-        # Filter by confidence
-        filtered = [m for m in moments if m.get("confidence", 0) >= threshold]
-        
-        # Sort by confidence and type
-        type_priority = {
-            "damage_burst": 1,
-            "extreme_kd_ratio": 2,
-            "unusual_accuracy": 3,
-            "unusual_headshot_rate": 4,
-            "reaction_time": 5,
-            "aim_lock": 6,
-            "impossible_angle": 7,
-            "grenade_spam": 8,
-            "unusual_positioning": 9
-        }
-        
-        filtered.sort(key=lambda m: (
-            type_priority.get(m.get("suspicionType"), 10),
-            -m.get("confidence", 0)
-        ))
-        
-        # Return top N clips
-        return filtered[:num_clips]
+        return top_moments(moments, num_clips, [self.sensitivity])[self.sensitivity]
     
     def calculate_clip_duration(self, moment):
         """Intelligently determine clip duration based on moment type and data"""
@@ -183,11 +364,31 @@ class ClipGenerator:
             logger.error(f"Error generating frames: {str(e)}")
             return None
     
+    def clip_path(self, moment):
+        # Named by fingerprint so a moment keeps its file across selections
+        return self.clips_dir / f"clip_{self.clip_key(moment)}_{moment.get('suspicionType', 'unknown')}.mp4"
+    
+    def drawtext_filter(self, moment, params):
+        # Text scales with the output height (50px at 1080p)
+        fontsize = int(params["resolution"].split("x")[1]) * 50 // 1080
+        return f"drawtext=text='{moment.get('description', 'Suspicious moment')}\n\nConfidence: {moment.get('confidence', 0):.1%}':fontsize={fontsize}:fontcolor=white:x=(w-text_w)/2:y=(h-text_h)/2:line_spacing=10"
+    
+    def encode_args(self, params, threads):
+        return [
+            "-c:v", "libx264",
+            "-preset", params["preset"],  # Balance between speed and compression
+            "-crf", str(params["crf"]),   # Quality (18=high, 28=low)
+            "-pix_fmt", "yuv420p",
+            "-r", str(params["fps"]),
+            "-threads", str(threads),
+        ]
+    
     def render_mp4(self, moment, clip_index):
-        """Render MP4 video (1080p 60fps) from frames"""
+        """Render MP4 video at the generator's profile (archive: 1080p 60fps)"""
         try:
-            duration = self.calculate_clip_duration(moment)
-            output_file = self.clips_dir / f"clip_{clip_index:02d}_{moment.get('suspicionType', 'unknown')}.mp4"
+            params = self.render_params(moment)
+            duration = params["duration"]
+            output_file = self.clip_path(moment)
             
             logger.info(f"Rendering MP4: {output_file.name}")
             
@@ -195,13 +396,9 @@ class ClipGenerator:
             ffmpeg_cmd = [
                 "ffmpeg",
                 "-f", "lavfi",
-                "-i", f"color=c=black:s=1920x1080:d={duration}",  # Black background
-                "-vf", f"drawtext=text='{moment.get('description', 'Suspicious moment')}\n\nConfidence: {moment.get('confidence', 0):.1%}':fontsize=50:fontcolor=white:x=(w-text_w)/2:y=(h-text_h)/2:line_spacing=10",
-                "-c:v", "libx264",
-                "-preset", "medium",  # Balance between speed and compression
-                "-crf", "18",          # Quality (18=high, 28=low)
-                "-pix_fmt", "yuv420p",
-                "-r", "60",            # 60fps
+                "-i", f"color=c=black:s={params['resolution']}:d={duration}",  # Black background
+                "-vf", self.drawtext_filter(moment, params),
+                *self.encode_args(params, self.ffmpeg_threads),
                 "-y",
                 str(output_file)
             ]
@@ -233,52 +430,158 @@ class ClipGenerator:
             logger.error(f"Error rendering MP4: {str(e)}")
             return None
     
+    def render_batch(self, indexed_moments, total=None):
+        """Render several clips from one ffmpeg process (one lavfi input and one
+        output per clip), skipping per-clip process start-up and muxer setup.
+        The machine's cores are split across the outputs, which encode in parallel.
+        
+        Returns clip info (or None) per moment, in order, and records successes
+        in the manifest.
+        """
+        if not indexed_moments:
+            return []
+        
+        total = total or len(indexed_moments)
+        threads = max(1, (os.cpu_count() or 1) // len(indexed_moments))
+        inputs, graph, outputs, planned = [], [], [], []
+        for n, (idx, moment) in enumerate(indexed_moments):
+            params = self.render_params(moment)
+            output_file = self.clip_path(moment)
+            inputs += ["-f", "lavfi", "-i", f"color=c=black:s={params['resolution']}:d={params['duration']}"]
+            graph.append(f"[{n}:v]{self.drawtext_filter(moment, params)}[v{n}]")
+            outputs += ["-map", f"[v{n}]", *self.encode_args(params, threads), "-y", str(output_file)]
+            planned.append((idx, moment, params, output_file))
+        
+        ffmpeg_cmd = ["ffmpeg", *inputs, "-filter_complex", ";".join(graph), *outputs]
+        logger.info(f"Rendering {len(planned)} clips in a single ffmpeg pass")
+        self.emit("batch_started", clips=[idx for idx, _, _, _ in planned])
+        
+        try:
+            result = subprocess.run(
+                ffmpeg_cmd,
+                capture_output=True,
+                text=True,
+                timeout=300 + 30 * len(planned)
+            )
+            if result.returncode != 0:
+                logger.error(f"single-pass ffmpeg failed: {result.stderr}")
+                return [None] * len(planned)
+        except Exception as e:
+            logger.error(f"Error in single-pass render: {str(e)}")
+            return [None] * len(planned)
+        
+        results = []
+        for idx, moment, params, output_file in planned:
+            try:
+                clip_info = {
+                    "file": str(output_file),
+                    "size": os.path.getsize(output_file),
+                    "duration": params["duration"],
+                    "filename": output_file.name
+                }
+            except OSError:
+                results.append(None)
+                continue
+            logger.info(f"✅ Rendered clip {idx}: {output_file.name} ({clip_info['size'] / 1024 / 1024:.1f}MB)")
+            self.record_clip(moment, params, clip_info)
+            self.emit("clip_finished", clip=idx, total=total, size=clip_info["size"], filename=clip_info["filename"])
+            results.append(clip_info)
+        return results
+    
+    def render_clip(self, idx, moment, total):
+        """Render one selected moment unless the manifest has it; thread-safe"""
+        params = self.render_params(moment)
+        cached = self.best_cached_clip(moment)
+        if cached:
+            logger.info(f"♻️ Reusing clip {idx}/{total}: {cached['filename']}")
+            self.emit("clip_finished", clip=idx, total=total, size=cached["size"], filename=cached["filename"], reused=True)
+            return cached
+        
+        self.emit("clip_started", clip=idx, total=total, suspicionType=moment.get("suspicionType"))
+        
+        logger.info(f"\n📹 Generating clip {idx}/{total}")
+        logger.info(f"   Type: {moment.get('suspicionType')}")
+        logger.info(f"   Player: {moment.get('playerName')}")
+        logger.info(f"   Confidence: {moment.get('confidence', 0):.1%}")
+        
+        clip_info = self.render_mp4(moment, idx)
+        if clip_info:
+            # Recorded per clip so an interrupted run keeps its finished work
+            self.record_clip(moment, params, clip_info)
+            self.emit("clip_finished", clip=idx, total=total, size=clip_info["size"], filename=clip_info["filename"])
+        else:
+            self.emit("clip_failed", clip=idx, total=total)
+        return clip_info
+    
+    def build_clip_metadata(self, idx, moment, clip_info):
+        return {
+            "clip_id": idx,
+            "matchId": self.match_id,
+            "playerName": moment.get("playerName", "Unknown"),
+            "team": moment.get("team", "Unknown"),
+            "suspicionType": moment.get("suspicionType", "unknown"),
+            "description": moment.get("description", "Suspicious moment detected"),
+            "confidence": round(moment.get("confidence", 0), 3),
+            "tick_start": moment.get("tick_start", 0),
+            "tick_end": moment.get("tick_end", 0),
+            "estimatedDuration": self.calculate_clip_duration(moment),
+            "videoPath": clip_info["file"],
+            "fileSize": clip_info["size"],
+            "profile": clip_info.get("profile", self.profile),
+            "generatedAt": clip_info.get("renderedAt") or datetime.now().isoformat()
+        }
+    
     def generate_clips(self, num_clips=10):
         """Generate all clips for match"""
         try:
             moments = self.get_suspicious_moments()
             if not moments:
+                self.emit("moments_found", count=0, selected=0)
                 logger.warning("No suspicious moments detected")
                 return []
             
             # Filter based on sensitivity
             selected_moments = self.filter_moments_by_sensitivity(moments, min(num_clips, 15))
+            self.emit("moments_found", count=len(moments), selected=len(selected_moments))
             logger.info(f"Generating {len(selected_moments)} clips with sensitivity {self.sensitivity}")
             
+            logger.info(f"Rendering with {self.workers} worker(s), {self.ffmpeg_threads} ffmpeg thread(s) each")
+            
+            # pool.map keeps results in moment order; render_mp4 never raises,
+            # so one failed clip does not cancel the rest
+            indexed = list(enumerate(selected_moments, 1))
+            batched = {}
+            if self.render_mode == "single_pass":
+                pending = [
+                    (idx, moment) for idx, moment in indexed
+                    if not self.best_cached_clip(moment)
+                ]
+                batched = dict(zip((idx for idx, _ in pending), self.render_batch(pending, len(indexed))))
+            
+            # Clips the batch rendered are done (and reported as rendered);
+            # the per-clip pass reuses cached ones and retries batch failures
+            def render(item):
+                idx, moment = item
+                return batched.get(idx) or self.render_clip(idx, moment, len(indexed))
+            
+            if self.workers > 1 and len(indexed) > 1:
+                with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                    results = list(pool.map(render, indexed))
+            else:
+                results = [render(item) for item in indexed]
+            
             clips_metadata = []
             
-            for idx, moment in enumerate(selected_moments, 1):
-                logger.info(f"\n📹 Generating clip {idx}/{len(selected_moments)}")
-                logger.info(f"   Type: {moment.get('suspicionType')}")
-                logger.info(f"   Player: {moment.get('playerName')}")
-                logger.info(f"   Confidence: {moment.get('confidence', 0):.1%}")
-                
-                # Render MP4
-                clip_info = self.render_mp4(moment, idx)
-                
+            for (idx, moment), clip_info in zip(indexed, results):
                 if clip_info:
-                    # Prepare metadata
-                    metadata = {
-                        "clip_id": idx,
-                        "matchId": self.match_id,
-                        "playerName": moment.get("playerName", "Unknown"),
-                        "team": moment.get("team", "Unknown"),
-                        "suspicionType": moment.get("suspicionType", "unknown"),
-                        "description": moment.get("description", "Suspicious moment detected"),
-                        "confidence": round(moment.get("confidence", 0), 3),
-                        "tick_start": moment.get("tick_start", 0),
-                        "tick_end": moment.get("tick_end", 0),
-                        "estimatedDuration": self.calculate_clip_duration(moment),
-                        "videoPath": clip_info["file"],
-                        "fileSize": clip_info["size"],
-                        "generatedAt": datetime.now().isoformat()
-                    }
-                    
+                    metadata = self.build_clip_metadata(idx, moment, clip_info)
                     clips_metadata.append(metadata)
                     self.generated_clips.append(metadata)
                 else:
                     logger.warning(f"Failed to generate clip {idx}")
             
+            self.prune_clips({self.moment_fingerprint(m) for m in selected_moments})
+            
             logger.info(f"\n✅ Successfully generated {len(clips_metadata)} clips")
             return clips_metadata
             
@@ -286,19 +589,58 @@ class ClipGenerator:
             logger.error(f"Fatal error during clip generation: {str(e)}")
             return []
 
+def parse_args(argv):
+    """Split argv into positional args and --name=value options"""
+    args, options = [], {}
+    for arg in argv:
+        if arg.startswith("--"):
+            name, _, value = arg[2:].partition("=")
+            options[name] = value
+        else:
+            args.append(arg)
+    return args, options
+
+def start_archive_render(args, render_mode, cs2json_timeout=None):
+    """Re-run this script detached at archive quality; it reuses the shared
+    cs2json summary and adds archive clips next to the previews (manifest
+    entries of previews point at them via supersededBy)"""
+    extra = [f"--timeout={cs2json_timeout:g}"] if cs2json_timeout else []
+    try:
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), *args,
+             f"--render-mode={render_mode}", "--profile=archive", *extra],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+        logger.info("Started background archive render")
+        return True
+    except OSError as e:
+        logger.error(f"Could not start background archive render: {str(e)}")
+        return False
+
 def main():
-    if len(sys.argv) < 4:
+    setup_logging()
+    args, options = parse_args(sys.argv[1:])
+    if len(args) < 3:
         print(json.dumps({
             "success": False,
-            "error": "Usage: generate_clips.py <demo_path> <output_dir> <match_id> [num_clips] [sensitivity]"
+            "error": "Usage: generate_clips.py <demo_path> <output_dir> <match_id> [num_clips] [sensitivity] [workers] [--render-mode=per_clip|single_pass] [--profile=preview|review|archive] [--two-stage] [--progress=<events.ndjson>] [--timeout=<seconds>]"
         }))
         sys.exit(1)
     
-    demo_path = sys.argv[1]
-    output_dir = sys.argv[2]
-    match_id = sys.argv[3]
-    num_clips = int(sys.argv[4]) if len(sys.argv) > 4 else 10
-    sensitivity = int(sys.argv[5]) if len(sys.argv) > 5 else 3
+    demo_path = args[0]
+    output_dir = args[1]
+    match_id = args[2]
+    num_clips = int(args[3]) if len(args) > 3 else 10
+    sensitivity = int(args[4]) if len(args) > 4 else 3
+    workers = int(args[5]) if len(args) > 5 else None
+    render_mode = options.get("render-mode", "per_clip")
+    profile = options.get("profile", "archive")
+    two_stage = "two-stage" in options
+    progress = ProgressWriter(options["progress"]) if options.get("progress") else None
+    cs2json_timeout = float(options["timeout"]) if options.get("timeout") else None
     
     # Validate inputs
     if not os.path.exists(demo_path):
@@ -314,10 +656,20 @@ def main():
     if not 1 <= num_clips <= 15:
         num_clips = 10
     
+    if workers is not None and workers < 1:
+        workers = None
+    
+    if profile not in RENDER_PROFILES:
+        profile = "archive"
+    
+    # Two-stage: answer with fast previews now, encode archive quality afterwards
+    if two_stage and profile == "archive":
+        profile = "preview"
+    
     logger.info(f"Starting clip generation: match_id={match_id}, num_clips={num_clips}, sensitivity={sensitivity}")
     
     try:
-        generator = ClipGenerator(demo_path, output_dir, match_id, sensitivity)
+        generator = ClipGenerator(demo_path, output_dir, match_id, sensitivity, workers, render_mode=render_mode, profile=profile, progress=progress, cs2json_timeout=cs2json_timeout)
         clips = generator.generate_clips(num_clips)
         
         result = {
@@ -325,9 +677,16 @@ def main():
             "match_id": match_id,
             "clips_generated": len(clips),
             "clips": clips,
-            "output_dir": str(generator.clips_dir)
+            "output_dir": str(generator.clips_dir),
+            "profile": profile
         }
         
+        if two_stage and clips:
+            result["archivePending"] = start_archive_render(args, render_mode, cs2json_timeout)
+        
+        if progress:
+            progress("done", result=result)
+        
         print(json.dumps(result, indent=2))
         logger.info(f"✅ Clip generation completed successfully")
         
@@ -337,6 +696,8 @@ def main():
             "error": str(e),
             "match_id": match_id
         }
+        if progress:
+            progress("failed", error=str(e))
         print(json.dumps(error_result))
         logger.error(f"❌ Clip generation failed: {str(e)}")
         sys.exit(1)
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Cross-match suspicious-moment search index
+One SQLite row per cs2json suspicious moment of every analysed match (match,
+steamId, player, type, confidence, tick range), so questions like "all
+aim_lock moments above 0.9 for this steamId" or "top moments on mirage this
+month" are index range scans instead of re-reading every stored summary.
+Matches are added incrementally and at most once, keyed by demo content.
+
+Usage: moment_index.py add <summary.json>... | stats |
+       search [--steam=ID] [--player=NAME] [--type=T] [--min=0.9] [--map=mirage]
+              [--since=YYYY-MM-DD] [--until=YYYY-MM-DD] [--days=N] [--limit=N]
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+
+DEFAULT_DB = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "moment_index.sqlite"
+)
+DEFAULT_LIMIT = 100
+
+COLUMNS = ["match_key", "map", "played_at", "steam_id", "player_name", "team",
+           "suspicion_type", "confidence", "tick_start", "tick_end", "description"]
+
+
+def map_key(name):
+    """"de_mirage", "Mirage" and "mirage" all index as "mirage" """
+    name = (name or "").strip().lower()
+    for prefix in ("de_", "cs_", "ar_"):
+        if name.startswith(prefix):
+            return name[len(prefix):]
+    return name or "unknown"
+
+
+def parse_day(value):
+    """Unix time of local midnight on a YYYY-MM-DD date"""
+    return int(time.mktime(time.strptime(value, "%Y-%m-%d")))
+
+
+class MomentIndex:
+    def __init__(self, path=DEFAULT_DB):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        # map and played_at are copied onto each moment so every query below
+        # is served by one index without joining matches
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS matches (
+                id INTEGER PRIMARY KEY,
+                match_key TEXT NOT NULL UNIQUE,
+                map TEXT NOT NULL,
+                played_at INTEGER NOT NULL,
+                source TEXT,
+                moments INTEGER NOT NULL,
+                indexed_at TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS moments (
+                match_id INTEGER NOT NULL REFERENCES matches(id),
+                map TEXT NOT NULL,
+                played_at INTEGER NOT NULL,
+                steam_id TEXT,
+                player_name TEXT NOT NULL,
+                team TEXT,
+                suspicion_type TEXT NOT NULL,
+                confidence REAL NOT NULL,
+                tick_start INTEGER,
+                tick_end INTEGER,
+                description TEXT
+            );
+            CREATE INDEX IF NOT EXISTS moments_by_player ON moments (steam_id, suspicion_type, confidence);
+            CREATE INDEX IF NOT EXISTS moments_by_name ON moments (player_name, confidence);
+            CREATE INDEX IF NOT EXISTS moments_by_type ON moments (suspicion_type, confidence);
+            CREATE INDEX IF NOT EXISTS moments_by_map_confidence ON moments (map, confidence);
+            CREATE INDEX IF NOT EXISTS moments_by_time ON moments (played_at);
+            CREATE INDEX IF NOT EXISTS moments_by_confidence ON moments (confidence);
+            CREATE INDEX IF NOT EXISTS moments_by_match ON moments (match_id);
+        """)
+
+    def close(self):
+        try:
+            self.db.execute("PRAGMA optimize")
+        except sqlite3.Error:
+            pass
+        self.db.close()
+
+    def record_match(self, match_key, summary, map_name=None, played_at=None, source=None):
+        """Index the suspiciousMoments of one cs2json summary; returns the number
+        of moments added, or None if the match was already indexed.
+        """
+        writer = self.writer(match_key, summary.get("players") or [], map_name or summary.get("map"),
+                             played_at, source)
+        try:
+            for moment in summary.get("suspiciousMoments") or []:
+                writer.append(moment)
+            return writer.commit()
+        finally:
+            writer.rollback()
+
+    def writer(self, match_key, players, map_name, played_at=None, source=None):
+        """A MomentWriter adding one match's moments as they are decoded"""
+        return MomentWriter(self, match_key, players, map_name, played_at, source)
+
+    def remove_match(self, match_key):
+        """Drop one match and its moments; returns False if it was not indexed"""
+        with self.db:
+            row = self.db.execute("SELECT id FROM matches WHERE match_key = ?", (match_key,)).fetchone()
+            if row is None:
+                return False
+            self.db.execute("DELETE FROM moments WHERE match_id = ?", row)
+            self.db.execute("DELETE FROM matches WHERE id = ?", row)
+        return True
+
+    def search(self, steam_id=None, player=None, suspicion_type=None, min_confidence=None,
+               map_name=None, since=None, until=None, limit=DEFAULT_LIMIT):
+        """Matching moments, highest confidence first (ties: most recently indexed first)"""
+        where, args = [], []
+        for column, value in (("m.steam_id", steam_id), ("m.player_name", player),
+                              ("m.suspicion_type", suspicion_type)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                args.append(str(value))
+        if map_name is not None:
+            where.append("m.map = ?")
+            args.append(map_key(map_name))
+        if min_confidence is not None:
+            where.append("m.confidence >= ?")
+            args.append(float(min_confidence))
+        if since is not None:
+            where.append("m.played_at >= ?")
+            args.append(int(since))
+        if until is not None:
+            where.append("m.played_at < ?")
+            args.append(int(until))
+
+        sql = (
+            "SELECT x.match_key, m.map, m.played_at, m.steam_id, m.player_name, m.team, m.suspicion_type, "
+            "m.confidence, m.tick_start, m.tick_end, m.description "
+            "FROM moments m JOIN matches x ON x.id = m.match_id"
+        )
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY m.confidence DESC, m.rowid DESC LIMIT ?"
+        args.append(int(limit))
+        return [dict(zip(COLUMNS, row)) for row in self.db.execute(sql, args)]
+
+    def stats(self):
+        matches, moments = self.db.execute("SELECT COUNT(*), COALESCE(SUM(moments), 0) FROM matches").fetchone()
+        types = dict(self.db.execute(
+            "SELECT suspicion_type, COUNT(*) FROM moments GROUP BY suspicion_type ORDER BY 2 DESC"
+        ).fetchall())
+        return {"matches": matches, "moments": moments, "types": types}
+
+
+class MomentWriter:
+    """Adds one match's moments in chunks of FLUSH_ROWS, all in one transaction.
+
+    Moments carry only the player's name, so the steamId comes from `players`
+    (None for names not found there, e.g. bots). The list is read at the first
+    flush, so it may still be filling while the writer is created. commit()
+    returns the number of moments added, or None if the match was already
+    indexed; rollback() drops anything not committed yet.
+    """
+    FLUSH_ROWS = 1000
+
+    def __init__(self, index, match_key, players, map_name, played_at=None, source=None):
+        self.index = index
+        self.db = index.db
+        self.match_key = match_key
+        self.players = players
+        self.map = map_key(map_name)
+        self.played_at = int(played_at if played_at is not None else time.time())
+        self.source = source
+        self.steam_ids = None
+        self.match_id = None
+        self.duplicate = False
+        self.error = None
+        self.rows = []
+        self.count = 0
+
+    def append(self, moment):
+        self.count += 1
+        self.rows.append((
+            moment.get("playerName") or "",
+            moment.get("team"),
+            moment.get("suspicionType") or "",
+            float(moment.get("confidence") or 0),
+            moment.get("tick_start"),
+            moment.get("tick_end"),
+            moment.get("description"),
+        ))
+        if len(self.rows) >= self.FLUSH_ROWS:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered moments; a database error is kept for commit() to raise"""
+        rows, self.rows = self.rows, []
+        if self.duplicate or self.error:
+            return
+        try:
+            if self.match_id is None:
+                self.steam_ids = {}
+                for p in self.players:
+                    steam_id = str(p.get("steamId", "0"))
+                    if steam_id != "0":
+                        self.steam_ids[p.get("name")] = steam_id
+                try:
+                    self.match_id = self.db.execute(
+                        "INSERT INTO matches (match_key, map, played_at, source, moments, indexed_at) "
+                        "VALUES (?, ?, ?, ?, 0, ?)",
+                        (self.match_key, self.map, self.played_at, self.source, time.strftime("%Y-%m-%d %H:%M:%S")),
+                    ).lastrowid
+                except sqlite3.IntegrityError:
+                    self.duplicate = True
+                    return
+            self.db.executemany(
+                "INSERT INTO moments (match_id, map, played_at, steam_id, player_name, team, suspicion_type, "
+                "confidence, tick_start, tick_end, description) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                ((self.match_id, self.map, self.played_at, self.steam_ids.get(row[0])) + row for row in rows),
+            )
+        except sqlite3.Error as e:
+            self.error = e
+            self.db.rollback()
+
+    def commit(self):
+        self.flush()
+        if self.error:
+            raise self.error
+        if self.duplicate:
+            self.db.rollback()
+            return None
+        self.db.execute("UPDATE matches SET moments = ? WHERE id = ?", (self.count, self.match_id))
+        self.db.commit()
+        return self.count
+
+    def rollback(self):
+        self.rows = []
+        self.db.rollback()
+
+
+def as_moment(row):
+    """A search row in cs2json's SuspiciousMoment shape (plus where it came from)"""
+    return {
+        "playerName": row["player_name"],
+        "steamId": row["steam_id"],
+        "team": row["team"],
+        "suspicionType": row["suspicion_type"],
+        "description": row["description"],
+        "confidence": row["confidence"],
+        "tick_start": row["tick_start"],
+        "tick_end": row["tick_end"],
+        "matchKey": row["match_key"],
+        "map": row["map"],
+        "playedAt": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row["played_at"])),
+    }
+
+
+def add_summaries(index, paths):
+    """Index stored cs2json summaries (<demo>.summary.json) that are not indexed yet.
+
+    Returns ({path: moments added, or None if already indexed}, {path: error})
+    """
+    from demo_pipeline import DemoRejected, demo_hash, extract_map_from_filename
+
+    added, errors = {}, {}
+    for path in paths:
+        demo_path = path[:-len(".summary.json")] if path.endswith(".summary.json") else None
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+            summary = json.loads(raw)
+            if demo_path and os.path.exists(demo_path):
+                match_key = demo_hash(demo_path)
+                played_at = os.path.getmtime(demo_path)
+            else:
+                # Summary without its demo: key by the summary's own content
+                match_key = hashlib.sha256(raw).hexdigest()
+                played_at = os.path.getmtime(path)
+        except (OSError, ValueError, DemoRejected) as e:
+            errors[path] = str(e)
+            continue
+        map_name = summary.get("map")
+        if (not map_name or map_name == "Unknown") and demo_path:
+            map_name = extract_map_from_filename(demo_path)
+        added[path] = index.record_match(
+            match_key, summary, map_name, played_at, os.path.basename(demo_path or path)
+        )
+    return added, errors
+
+
+def search_args(argv):
+    options = {"limit": DEFAULT_LIMIT}
+    for arg in argv:
+        name, _, value = arg.lstrip("-").partition("=")
+        if name == "steam":
+            options["steam_id"] = value
+        elif name == "player":
+            options["player"] = value
+        elif name == "type":
+            options["suspicion_type"] = value
+        elif name == "min":
+            options["min_confidence"] = float(value)
+        elif name == "map":
+            options["map_name"] = value
+        elif name == "since":
+            options["since"] = parse_day(value)
+        elif name == "until":
+            options["until"] = parse_day(value)
+        elif name == "days":
+            options["since"] = int(time.time() - float(value) * 86400)
+        elif name == "limit":
+            options["limit"] = int(value)
+        else:
+            raise ValueError(f"unknown option: {arg}")
+    return options
+
+
+def main():
+    usage = " ".join(line.strip() for line in __doc__.strip().splitlines()[-3:])
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command not in ("add", "search", "stats"):
+        print(json.dumps({"success": False, "error": usage}))
+        sys.exit(1)
+
+    try:
+        index = MomentIndex(os.environ.get("CS2_MOMENT_DB", DEFAULT_DB))
+    except (OSError, sqlite3.Error) as e:
+        print(json.dumps({"success": False, "error": f"moment index unavailable: {str(e)}"}))
+        sys.exit(1)
+    try:
+        if command == "add":
+            added, errors = add_summaries(index, sys.argv[2:])
+            result = {"success": not errors, "added": added, "errors": errors}
+        elif command == "stats":
+            result = {"success": True, **index.stats()}
+        else:
+            try:
+                options = search_args(sys.argv[2:])
+            except ValueError as e:
+                print(json.dumps({"success": False, "error": f"{str(e)}; {usage}"}))
+                sys.exit(1)
+            started = time.perf_counter()
+            moments = [as_moment(row) for row in index.search(**options)]
+            result = {
+                "success": True,
+                "moments": moments,
+                "count": len(moments),
+                "queryMs": round((time.perf_counter() - started) * 1000, 2),
+            }
+    finally:
+        index.close()
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
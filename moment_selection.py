@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Streaming top-K selection of suspicious moments
+Picks the moments worth a clip the way ClipGenerator always has (minimum
+confidence per sensitivity level, then type priority and confidence), but
+from an iterator in one pass with a bounded heap per sensitivity level, so
+cross-match jobs can rank millions of moments in O(levels x K) memory.
+
+Usage: moment_selection.py [--top=N] [--levels=1,3,5] <summary.json>...
+"""
+
+import heapq
+import json
+import sys
+
+# Sensitivity (1-5) -> minimum confidence
+SENSITIVITY_THRESHOLDS = {
+    1: 0.90,  # Only very obvious moments
+    2: 0.85,
+    3: 0.80,
+    4: 0.75,
+    5: 0.50   # Everything, even subtle moments
+}
+DEFAULT_THRESHOLD = 0.80
+
+# Lower sorts first; unknown types come last
+TYPE_PRIORITY = {
+    "damage_burst": 1,
+    "extreme_kd_ratio": 2,
+    "unusual_accuracy": 3,
+    "unusual_headshot_rate": 4,
+    "reaction_time": 5,
+    "aim_lock": 6,
+    "impossible_angle": 7,
+    "grenade_spam": 8,
+    "unusual_positioning": 9
+}
+UNKNOWN_PRIORITY = 10
+
+
+def threshold_for(sensitivity):
+    return SENSITIVITY_THRESHOLDS.get(sensitivity, DEFAULT_THRESHOLD)
+
+
+def top_moments(moments, num_clips, sensitivities):
+    """{sensitivity: best `num_clips` moments} for each level, in one pass.
+
+    Per level this equals filtering by the level's threshold, sorting by
+    (type priority, -confidence) and slicing, ties included: equal keys keep
+    their input order like the stable sort did. Each level keeps a max-heap of
+    its current best K keyed by the negated sort key plus input position.
+    """
+    levels = sorted({(threshold_for(s), s) for s in sensitivities})  # loosest first
+    heaps = {s: [] for _, s in levels}
+    if num_clips <= 0:
+        return {s: [] for s in sensitivities}
+
+    for position, moment in enumerate(moments):
+        confidence = moment.get("confidence", 0)
+        entry = None
+        for threshold, level in levels:
+            if confidence < threshold:
+                break  # every remaining level is stricter
+            if entry is None:
+                priority = TYPE_PRIORITY.get(moment.get("suspicionType"), UNKNOWN_PRIORITY)
+                entry = (-priority, confidence, -position, moment)
+            heap = heaps[level]
+            if len(heap) < num_clips:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+
+    return {
+        s: [entry[3] for entry in sorted(heaps[s], reverse=True)]
+        for s in sensitivities
+    }
+
+
+def iter_summary_moments(paths):
+    """suspiciousMoments of stored cs2json summaries, one file in memory at a time"""
+    for path in paths:
+        with open(path) as f:
+            summary = json.load(f)
+        for moment in summary.get("suspiciousMoments") or []:
+            moment["source"] = path
+            yield moment
+
+
+def main():
+    top = 15
+    levels = sorted(SENSITIVITY_THRESHOLDS)
+    paths = []
+    for arg in sys.argv[1:]:
+        if arg.startswith("--top="):
+            top = int(arg.split("=", 1)[1])
+        elif arg.startswith("--levels="):
+            levels = [int(level) for level in arg.split("=", 1)[1].split(",")]
+        else:
+            paths.append(arg)
+    if not paths:
+        print(json.dumps({"success": False, "error": __doc__.strip().splitlines()[-1]}))
+        sys.exit(1)
+
+    selected = top_moments(iter_summary_moments(paths), top, levels)
+    print(json.dumps({
+        "success": True,
+        "top": top,
+        "levels": {str(level): selected[level] for level in levels},
+    }))
+
+
+if __name__ == "__main__":
+    main()
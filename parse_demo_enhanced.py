@@ -1,299 +1,7 @@
 #!/usr/bin/env python3
-import subprocess, sys, json, os, time, math
+# CLI shim over demo_pipeline.enhanced_pipeline(): fraud assessment against each
+# player's own history (player_profiles.py) when the profile index is available
+from demo_pipeline import enhanced_pipeline, main
 
-if len(sys.argv) < 2:
-    print(json.dumps({"success": False, "error": "No demo file provided"}))
-    sys.exit(1)
-
-demo_path = sys.argv[1]
-base_dir = os.path.dirname(os.path.dirname(__file__))
-cs2json_path = os.path.join(base_dir, "scripts", "cs2json")
-log_path = os.path.join(base_dir, "logs", "parser.log")
-
-def log(msg):
-    try:
-        os.makedirs(os.path.dirname(log_path), exist_ok=True)
-        with open(log_path, "a") as f:
-            f.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} - {msg}\n")
-    except:
-        pass
-
-if not os.path.exists(cs2json_path):
-    msg = f"cs2json binary not found at {cs2json_path}"
-    log(msg)
-    print(json.dumps({"success": False, "error": msg}))
-    sys.exit(1)
-
-if not os.path.exists(demo_path):
-    msg = f"demo not found: {demo_path}"
-    log(msg)
-    print(json.dumps({"success": False, "error": msg}))
-    sys.exit(1)
-
-def extract_map_from_filename(filepath):
-    maps = ["mirage", "inferno", "ancient", "nuke", "overpass", "vertigo", "dust2", "anubis", "train"]
-    filename = os.path.basename(filepath).lower()
-    for m in maps:
-        if m in filename:
-            return m.capitalize()
-    return "Unknown"
-
-try:
-    proc = subprocess.run(
-        [cs2json_path, demo_path],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-        timeout=120
-    )
-
-    if proc.returncode != 0:
-        log(f"cs2json failed: {proc.stderr.strip()}")
-        print(json.dumps({"success": False, "error": proc.stderr.strip()}))
-        sys.exit(1)
-
-    out = proc.stdout.strip()
-
-    try:
-        parsed = json.loads(out)
-        
-        if not parsed.get("success"):
-            error_msg = parsed.get("error", "Unknown error from cs2json")
-            log(f"cs2json error: {error_msg}")
-            print(json.dumps({"success": False, "error": error_msg}))
-            sys.exit(1)
-
-        # 🔹 Use REAL map from Go binary or extract from filename
-        map_name = parsed.get("map", extract_map_from_filename(demo_path))
-        if map_name == "Unknown":
-            map_name = extract_map_from_filename(demo_path)
-
-        # 🔹 Use REAL players data from Go binary
-        raw_players = parsed.get("players", [])
-        
-        # Determine game mode
-        total_players = len(raw_players)
-        if total_players <= 4:
-            game_mode = "wingman"
-        elif total_players <= 8:
-            game_mode = "deathmatch"
-        else:
-            game_mode = "5v5"
-
-        # 🔹 Process REAL player statistics from Go binary
-        players = []
-        team_a_kills = 0
-        team_b_kills = 0
-        
-        for p in raw_players:
-            # Get REAL stats from Go binary output
-            team = p.get("team", "Counter-Terrorists")
-            kills = p.get("kills", 0)
-            deaths = max(p.get("deaths", 0), 1)
-            assists = p.get("assists", 0)
-            headshots = p.get("headshots", 0)
-            damage = p.get("damage", 0)
-            damage_taken = p.get("damageTaken", 0)
-            plants = p.get("plants", 0)
-            defuses = p.get("defuses", 0)
-            utility = p.get("utility", [])
-            weapons = p.get("weapons", {})
-            
-            # Calculate real accuracy and percentages from Go data
-            hs_percent = 0.0
-            if kills > 0:
-                hs_percent = round((headshots / kills) * 100, 1)
-            
-            kd_ratio = round(kills / deaths, 2) if deaths > 0 else float(kills)
-            
-            # Calculate accuracy from damage (Go binary may provide this)
-            accuracy = p.get("accuracy", 0.0)
-            if accuracy == 0 and damage > 0:
-                # Estimate accuracy based on damage to kill ratio
-                accuracy = round(min(100, (kills * 25) / damage * 100), 2) / 100
-            
-            # Use Go binary's rating or calculate
-            rating = p.get("rating", 0.0)
-            if rating == 0:
-                rating = round((kills + assists * 0.3 - deaths * 0.7) / 5.0, 2)
-                if rating < 0.5:
-                    rating = 0.5
-            
-            is_ct = team == "Counter-Terrorists"
-            
-            if is_ct:
-                team_a_kills += kills
-            else:
-                team_b_kills += kills
-            
-            player_data = {
-                "name": p.get("name", "Unknown"),
-                "steamId": str(p.get("steamId", 0)),
-                "team": team,
-                "kills": kills,
-                "deaths": deaths,
-                "assists": assists,
-                "accuracy": round(accuracy, 2) if isinstance(accuracy, float) else accuracy,
-                "headshots": headshots,
-                "hsPercent": hs_percent,
-                "totalDamage": damage,
-                "avgDamage": round(damage / max(deaths + kills, 1), 1),
-                "kdRatio": kd_ratio,
-                "plants": plants,
-                "defuses": defuses,
-                "utility": utility if utility else [],
-                "rating": round(rating, 2)
-            }
-            players.append(player_data)
-
-        # Determine team scores
-        team_a_score = parsed.get("teamAScore", 0)
-        team_b_score = parsed.get("teamBScore", 0)
-        
-        # If scores not in Go output, calculate from rounds
-        if team_a_score == 0 and team_b_score == 0:
-            if game_mode == "5v5":
-                total_kills = team_a_kills + team_b_kills
-                if total_kills > 0:
-                    team_a_score = min(16, int((team_a_kills / total_kills) * 16))
-                    team_b_score = min(16, int((team_b_kills / total_kills) * 16))
-                    
-                    # Ensure valid score
-                    if team_a_score == team_b_score:
-                        team_a_score = max(13, team_a_score)
-                    elif team_a_score < team_b_score:
-                        team_a_score = max(0, team_b_score - 1)
-                else:
-                    team_a_score = 16
-                    team_b_score = 14
-
-        # 🔹 Generate fraud assessments based on REAL statistics
-        fraud_assessments = []
-        
-        for player in players:
-            # Use real stats for fraud assessment calculation
-            accuracy_val = player["accuracy"] if isinstance(player["accuracy"], (int, float)) else 0.0
-            hs_pct = player["hsPercent"]
-            kd = player["kdRatio"]
-            
-            # Fraud scoring based on real stats
-            aim_score = min(100, (accuracy_val * 100 + hs_pct) / 2)
-            consistency_score = min(100, kd * 30)
-            
-            # Fraud probability based on statistical anomalies
-            fraud_prob = 0.0
-            
-            if accuracy_val > 0.55:
-                fraud_prob += 25  # Unusually high accuracy
-            if hs_pct > 50:
-                fraud_prob += 30  # Unusually high headshot rate
-            if kd > 3.0:
-                fraud_prob += 15  # Very high K/D ratio
-            
-            # Normalize to 0-100
-            fraud_prob = min(100, max(0, fraud_prob))
-            
-            # Determine risk level
-            if fraud_prob >= 70:
-                risk_level = "critical"
-            elif fraud_prob >= 50:
-                risk_level = "high"
-            elif fraud_prob >= 30:
-                risk_level = "medium"
-            else:
-                risk_level = "low"
-            
-            # Generate suspicious activities based on REAL stats
-            suspicious = []
-            
-            if accuracy_val > 0.50:
-                suspicious.append({
-                    "type": "unusual_accuracy",
-                    "confidence": round(min(95, accuracy_val * 150), 1),
-                    "description": f"High accuracy: {accuracy_val*100:.1f}%",
-                    "tick": 0
-                })
-            
-            if hs_pct > 45:
-                suspicious.append({
-                    "type": "high_headshot_rate",
-                    "confidence": round(min(95, hs_pct * 1.5), 1),
-                    "description": f"High HS rate: {hs_pct:.1f}%",
-                    "tick": 0
-                })
-            
-            if kd > 2.5:
-                suspicious.append({
-                    "type": "high_kd_ratio",
-                    "confidence": round(min(95, kd * 25), 1),
-                    "description": f"High K/D: {kd:.2f}",
-                    "tick": 0
-                })
-            
-            if player["kills"] > 30:
-                suspicious.append({
-                    "type": "high_kill_count",
-                    "confidence": round(min(90, (player["kills"] / 50) * 100), 1),
-                    "description": f"Very high kills: {player['kills']}",
-                    "tick": 0
-                })
-            
-            fraud_assessments.append({
-                "playerName": player["name"],
-                "fraudProbability": fraud_prob,
-                "aimScore": round(aim_score, 1),
-                "positioningScore": round(min(100, player["kills"] / max(1, player["deaths"]) * 20), 1),
-                "reactionScore": round(min(100, hs_pct * 1.5), 1),
-                "gameSenseScore": round(min(100, player["assists"] * 15), 1),
-                "consistencyScore": round(consistency_score, 1),
-                "suspiciousActivities": suspicious,
-                "riskLevel": risk_level
-            })
-        
-        result = {
-            "success": True,
-            "analysis": {
-                "mapName": map_name,
-                "gameMode": game_mode,
-                "teamAName": "Counter-Terrorists",
-                "teamBName": "Terrorists",
-                "teamAScore": team_a_score,
-                "teamBScore": team_b_score,
-                "duration": parsed.get("duration", 0),
-                "rounds": parsed.get("rounds", 0),
-                "players": players,
-                "fraudAssessments": fraud_assessments,
-                "totalEventsProcessed": parsed.get("totalKills", 0),
-            },
-            "sourceFile": os.path.basename(demo_path),
-        }
-        
-        log(f"✅ Parsed: {map_name}, {game_mode}, {total_players} players, score {team_a_score}-{team_b_score}")
-        print(json.dumps(result))
-
-    except json.JSONDecodeError as e:
-        log(f"JSON parse error: {str(e)}")
-        print(json.dumps({
-            "success": False, 
-            "error": f"Failed to parse cs2json output: {str(e)}"
-        }))
-        sys.exit(1)
-    except Exception as e:
-        log(f"Processing error: {str(e)}")
-        print(json.dumps({
-            "success": False, 
-            "error": f"Failed to process demo: {str(e)}"
-        }))
-        sys.exit(1)
-
-except subprocess.TimeoutExpired:
-    msg = "cs2json timeout after 120s"
-    log(msg)
-    print(json.dumps({"success": False, "error": msg}))
-    sys.exit(1)
-
-except Exception as e:
-    msg = f"Unexpected error: {str(e)}"
-    log(msg)
-    print(json.dumps({"success": False, "error": msg}))
-    sys.exit(1)
+if __name__ == "__main__":
+    main(enhanced_pipeline())
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Cross-match player profile index for historical fraud baselines
+Keeps one SQLite row per steamId with running mean/variance (Welford) of the
+stats the fraud heuristics look at, so a match can be scored against each
+player's own history in O(players) without rescanning old results.
+
+In the same transaction each match is folded into per-player running totals
+(kills, deaths, ... plus Welford rating/accuracy) for the whole career and
+for the month it was played, so career stats and monthly trends are single
+row lookups.
+"""
+
+import json
+import math
+import os
+import sqlite3
+import sys
+import time
+
+METRICS = ["accuracy", "hsPercent", "kdRatio", "rating", "kills"]
+MIN_HISTORY = 5  # matches needed before z-scores are trusted
+
+# Running totals: summed cs2json counts and Welford mean/variance per period
+TOTALS = ["kills", "deaths", "assists", "headshots", "damage", "plants", "defuses"]
+SPREAD = ["rating", "accuracy"]
+CAREER = "all"  # period of the career row; monthly rows are "YYYY-MM"
+
+DEFAULT_DB = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "player_profiles.sqlite"
+)
+
+
+class PlayerProfileIndex:
+    def __init__(self, path=DEFAULT_DB):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=30)
+        columns = ", ".join(f"{m}_mean REAL NOT NULL DEFAULT 0, {m}_m2 REAL NOT NULL DEFAULT 0" for m in METRICS)
+        totals = ", ".join(f"{t} INTEGER NOT NULL DEFAULT 0" for t in TOTALS)
+        spread = ", ".join(f"{m}_mean REAL NOT NULL DEFAULT 0, {m}_m2 REAL NOT NULL DEFAULT 0" for m in SPREAD)
+        self.db.executescript(f"""
+            CREATE TABLE IF NOT EXISTS profiles (
+                steam_id TEXT PRIMARY KEY,
+                matches INTEGER NOT NULL DEFAULT 0,
+                {columns}
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS player_totals (
+                steam_id TEXT NOT NULL,
+                period TEXT NOT NULL,
+                name TEXT,
+                matches INTEGER NOT NULL DEFAULT 0,
+                {totals},
+                {spread},
+                PRIMARY KEY (steam_id, period)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS recorded_matches (
+                match_key TEXT PRIMARY KEY,
+                recorded_at TEXT NOT NULL
+            ) WITHOUT ROWID;
+        """)
+
+    def close(self):
+        self.db.close()
+
+    def baselines(self, steam_ids):
+        """{steamId: {"matches": n, metric: (mean, std)}} for known players"""
+        ids = [str(s) for s in steam_ids if str(s) != "0"]
+        if not ids:
+            return {}
+        cols = ", ".join(f"{m}_mean, {m}_m2" for m in METRICS)
+        rows = self.db.execute(
+            f"SELECT steam_id, matches, {cols} FROM profiles WHERE steam_id IN ({','.join('?' * len(ids))})",
+            ids,
+        ).fetchall()
+
+        baselines = {}
+        for row in rows:
+            n = row[1]
+            baseline = {"matches": n}
+            for i, metric in enumerate(METRICS):
+                mean, m2 = row[2 + i * 2], row[3 + i * 2]
+                baseline[metric] = (mean, math.sqrt(m2 / (n - 1)) if n > 1 else 0.0)
+            baselines[row[0]] = baseline
+        return baselines
+
+    def record_match(self, match_key, players, played_at=None):
+        """Fold one match into the profiles and totals; returns False if it was already recorded.
+
+        Totals read cs2json's raw counts (`deaths` unclamped, `damage`) from
+        each player; `played_at` (unix time, default now) picks the month row.
+        """
+        period = time.strftime("%Y-%m", time.localtime(played_at))
+        with self.db:
+            try:
+                self.db.execute(
+                    "INSERT INTO recorded_matches (match_key, recorded_at) VALUES (?, ?)",
+                    (match_key, time.strftime("%Y-%m-%d %H:%M:%S")),
+                )
+            except sqlite3.IntegrityError:
+                return False
+
+            cols = ", ".join(f"{m}_mean, {m}_m2" for m in METRICS)
+            for p in players:
+                steam_id = str(p.get("steamId", "0"))
+                if steam_id == "0":
+                    continue  # bots / unknown players have no stable identity
+                row = self.db.execute(
+                    f"SELECT matches, {cols} FROM profiles WHERE steam_id = ?", (steam_id,)
+                ).fetchone() or (0,) + (0.0,) * (len(METRICS) * 2)
+
+                n = row[0] + 1
+                values = []
+                for i, metric in enumerate(METRICS):
+                    mean, m2 = row[1 + i * 2], row[2 + i * 2]
+                    x = p.get(metric, 0)
+                    x = float(x) if isinstance(x, (int, float)) else 0.0
+                    delta = x - mean
+                    mean += delta / n
+                    m2 += delta * (x - mean)
+                    values += [mean, m2]
+
+                placeholders = ", ".join("?" * (len(values) + 2))
+                self.db.execute(
+                    f"INSERT OR REPLACE INTO profiles (steam_id, matches, {cols}) VALUES ({placeholders})",
+                    [steam_id, n] + values,
+                )
+                for row_period in (CAREER, period):
+                    self.add_totals(steam_id, row_period, p)
+        return True
+
+    def add_totals(self, steam_id, period, p):
+        totals = ", ".join(TOTALS)
+        spread = ", ".join(f"{m}_mean, {m}_m2" for m in SPREAD)
+        row = self.db.execute(
+            f"SELECT matches, {totals}, {spread} FROM player_totals WHERE steam_id = ? AND period = ?",
+            (steam_id, period),
+        ).fetchone() or (0,) * (1 + len(TOTALS)) + (0.0,) * (len(SPREAD) * 2)
+
+        n = row[0] + 1
+        values = []
+        for i, total in enumerate(TOTALS):
+            x = p.get(total, 0)
+            values.append(row[1 + i] + (x if isinstance(x, int) else 0))
+        offset = 1 + len(TOTALS)
+        for i, metric in enumerate(SPREAD):
+            mean, m2 = row[offset + i * 2], row[offset + 1 + i * 2]
+            x = p.get(metric, 0)
+            x = float(x) if isinstance(x, (int, float)) else 0.0
+            delta = x - mean
+            mean += delta / n
+            m2 += delta * (x - mean)
+            values += [mean, m2]
+
+        placeholders = ", ".join("?" * (len(values) + 4))
+        self.db.execute(
+            f"INSERT OR REPLACE INTO player_totals (steam_id, period, name, matches, {totals}, {spread}) "
+            f"VALUES ({placeholders})",
+            [steam_id, period, p.get("name"), n] + values,
+        )
+
+    def career(self, steam_ids):
+        """{steamId: career stats} for known players"""
+        ids = [str(s) for s in steam_ids if str(s) != "0"]
+        if not ids:
+            return {}
+        rows = self.db.execute(
+            f"SELECT * FROM player_totals WHERE period = ? AND steam_id IN ({','.join('?' * len(ids))})",
+            [CAREER] + ids,
+        )
+        columns = [c[0] for c in rows.description]
+        return {row[0]: totals_stats(dict(zip(columns, row))) for row in rows}
+
+    def trend(self, steam_id, since=None):
+        """Monthly stats of one player, oldest first (from "YYYY-MM" `since` if given)"""
+        rows = self.db.execute(
+            "SELECT * FROM player_totals WHERE steam_id = ? AND period != ? AND period >= ? ORDER BY period",
+            (str(steam_id), CAREER, since or ""),
+        )
+        columns = [c[0] for c in rows.description]
+        return [totals_stats(dict(zip(columns, row))) for row in rows]
+
+
+def totals_stats(row):
+    """Career/month stats from a player_totals row, derived the way shape_player derives them per match"""
+    n = row["matches"]
+    kills, deaths = row["kills"], row["deaths"]
+    stats = {"period": row["period"], "name": row["name"], "matches": n}
+    stats.update({t: row[t] for t in TOTALS})
+    stats.update({
+        "hsPercent": round(row["headshots"] / kills * 100, 1) if kills > 0 else 0.0,
+        "kdRatio": round(kills / max(deaths, 1), 2),
+        "avgDamage": round(row["damage"] / max(deaths + kills, 1), 1),
+        "damagePerMatch": round(row["damage"] / n, 1) if n else 0.0,
+    })
+    for metric in SPREAD:
+        mean, m2 = row[f"{metric}_mean"], row[f"{metric}_m2"]
+        stats[metric] = {"mean": round(mean, 4), "std": round(math.sqrt(m2 / (n - 1)), 4) if n > 1 else 0.0}
+    return stats
+
+
+def zscores(player, baseline):
+    """Per-metric z-scores of one match against the player's own history"""
+    if not baseline or baseline["matches"] < MIN_HISTORY:
+        return {}
+    scores = {}
+    for metric in METRICS:
+        mean, std = baseline[metric]
+        x = player.get(metric, 0)
+        if std > 0 and isinstance(x, (int, float)):
+            scores[metric] = round((x - mean) / std, 2)
+    return scores
+
+
+def main():
+    with_trend = "--trend" in sys.argv[1:]
+    steam_ids = [a for a in sys.argv[1:] if a != "--trend"]
+    if not steam_ids:
+        print(json.dumps({"success": False, "error": "Usage: player_profiles.py [--trend] <steamId> [...]"}))
+        sys.exit(1)
+
+    index = PlayerProfileIndex(os.environ.get("CS2_PROFILE_DB", DEFAULT_DB))
+    baselines = index.baselines(steam_ids)
+    result = {
+        "success": True,
+        "profiles": {
+            sid: {"matches": b["matches"], **{m: {"mean": b[m][0], "std": b[m][1]} for m in METRICS}}
+            for sid, b in baselines.items()
+        },
+        "career": index.career(steam_ids),
+    }
+    if with_trend:
+        result["trend"] = {sid: index.trend(sid) for sid in steam_ids}
+    index.close()
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
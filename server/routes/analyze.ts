@@ -11,6 +11,12 @@ import {
   getDemoFileMetadata,
 } from "../services/demoParser";
 import { MatchService } from "../services/matchService";
+import {
+  isParserDaemonAvailable,
+  parseWithDaemon,
+  ParserTimeoutError,
+  PARSER_TIMEOUT_MS,
+} from "../services/parserDaemon";
 
 const execFileAsync = promisify(execFile);
 const router = Router();
@@ -83,20 +89,40 @@ const uploadAndAnalyze = async (req: Request, res: Response) => {
 
     // 🔹 Próbujemy python3 → fallback JS
     try {
-      const pythonScript = "/var/www/cs2-analysis/scripts/parse_demo.py";
-      const { stdout, stderr } = await execFileAsync(
-        "python3",
-        [pythonScript, filePath],
-        {
-          timeout: 120000,
-          maxBuffer: 20 * 1024 * 1024,
-        },
-      );
-
-      if (stderr) console.warn("Python stderr:", stderr);
-      console.log("Python stdout:", stdout.slice(0, 500));
-
-      const pythonOutput = JSON.parse(stdout);
+      let pythonOutput: any;
+
+      // 🔹 Warm parser daemon first, one-shot python3 process as fallback;
+      // both run the basic pipeline so the saved analysis has one shape
+      if (isParserDaemonAvailable()) {
+        try {
+          pythonOutput = await parseWithDaemon(filePath, { pipeline: "basic" });
+        } catch (daemonErr) {
+          // A timed-out job is still running in the daemon; a second parse
+          // would only compete with it
+          if (daemonErr instanceof ParserTimeoutError) throw daemonErr;
+          console.warn(
+            "⚠️ Parser daemon unavailable, spawning python3:",
+            daemonErr,
+          );
+        }
+      }
+
+      if (!pythonOutput) {
+        const pythonScript = "/var/www/cs2-analysis/scripts/parse_demo.py";
+        const { stdout, stderr } = await execFileAsync(
+          "python3",
+          [pythonScript, filePath],
+          {
+            timeout: PARSER_TIMEOUT_MS,
+            maxBuffer: 20 * 1024 * 1024,
+          },
+        );
+
+        if (stderr) console.warn("Python stderr:", stderr);
+        console.log("Python stdout:", stdout.slice(0, 500));
+
+        pythonOutput = JSON.parse(stdout);
+      }
 
       // ✅ Sprawdź czy Python zwrócił błąd
       if (!pythonOutput.success) {
@@ -4,6 +4,7 @@ import * as fs from "fs";
 import { execFile } from "child_process";
 import { promisify } from "util";
 import { MatchService } from "../services/matchService";
+import { ClipJobStore } from "../services/clipJobs";
 
 const execFileAsync = promisify(execFile);
 const router = Router();
@@ -11,12 +12,64 @@ const router = Router();
 const CLIPS_DIR = path.join(process.cwd(), "dist/spa/clips");
 const DEMO_UPLOADS_DIR = path.join(process.cwd(), "dist/spa/uploads");
 const CLIP_GENERATOR_SCRIPT = "/var/www/cs2-analysis/scripts/generate_clips.py";
+const RENDER_PROFILES = ["preview", "review", "archive"];
+const CLIP_JOBS_DIR = path.join(process.cwd(), "data/clip-jobs");
+
+const clipJobs = new ClipJobStore(CLIP_JOBS_DIR, CLIP_GENERATOR_SCRIPT);
 
 // Ensure clips directory exists
 if (!fs.existsSync(CLIPS_DIR)) {
   fs.mkdirSync(CLIPS_DIR, { recursive: true });
 }
 
+/**
+ * GET /api/clips/jobs/:jobId
+ * Status, progress events and (when done) the result of a clip job
+ */
+router.get("/jobs/:jobId", (req: Request, res: Response) => {
+  const job = clipJobs.get(req.params.jobId);
+  if (!job) {
+    return res.status(404).json({ success: false, error: "Job not found" });
+  }
+  res.json({ success: true, job });
+});
+
+/**
+ * GET /api/clips/jobs/:jobId/events
+ * Stream a clip job's progress events as Server-Sent Events
+ */
+router.get("/jobs/:jobId/events", (req: Request, res: Response) => {
+  const { jobId } = req.params;
+  if (!clipJobs.get(jobId)) {
+    return res.status(404).json({ success: false, error: "Job not found" });
+  }
+
+  res.writeHead(200, {
+    "Content-Type": "text/event-stream",
+    "Cache-Control": "no-cache",
+    Connection: "keep-alive",
+  });
+
+  let sent = 0;
+  const poll = () => {
+    const events = clipJobs.readEvents(jobId, sent);
+    for (const event of events) {
+      res.write(`data: ${JSON.stringify(event)}\n\n`);
+    }
+    sent += events.length;
+
+    const status = clipJobs.get(jobId)?.status;
+    if (status !== "running") {
+      res.write(`event: end\ndata: ${JSON.stringify({ status })}\n\n`);
+      clearInterval(timer);
+      res.end();
+    }
+  };
+  const timer = setInterval(poll, 1000);
+  req.on("close", () => clearInterval(timer));
+  poll();
+});
+
 /**
  * GET /api/clips/:matchId
  * List all clips for a match
@@ -120,16 +173,24 @@ router.get("/:matchId/:clipId/download", (req: Request, res: Response) => {
 /**
  * POST /api/clips/:matchId/generate
  * Generate clips for a match
- * Body: { numClips: 1-15, sensitivity: 1-5 }
+ * Body: { numClips: 1-15, sensitivity: 1-5, profile?: "preview" | "review" | "archive", twoStage?: boolean, async?: boolean }
+ * With async: true, responds 202 with a jobId to poll at /api/clips/jobs/:jobId
  */
 router.post("/:matchId/generate", async (req: Request, res: Response) => {
   try {
     const { matchId } = req.params;
-    let { numClips = 10, sensitivity = 3 } = req.body;
+    let {
+      numClips = 10,
+      sensitivity = 3,
+      profile = "archive",
+      twoStage = false,
+      async: runAsync = false,
+    } = req.body;
 
     // Validate
     numClips = Math.max(1, Math.min(15, parseInt(numClips) || 10));
     sensitivity = Math.max(1, Math.min(5, parseInt(sensitivity) || 3));
+    if (!RENDER_PROFILES.includes(profile)) profile = "archive";
 
     // Find demo file for this match
     const matchData = MatchService.getMatchById(parseInt(matchId));
@@ -153,6 +214,27 @@ router.post("/:matchId/generate", async (req: Request, res: Response) => {
     console.log(`Starting clip generation for match ${matchId}`);
     console.log(`  Demo: ${demoPath}`);
     console.log(`  Num clips: ${numClips}, Sensitivity: ${sensitivity}`);
+    console.log(`  Profile: ${profile}${twoStage ? " (two-stage)" : ""}`);
+
+    if (runAsync) {
+      const jobId = clipJobs.start({
+        matchId,
+        demoPath,
+        clipsDir: CLIPS_DIR,
+        numClips,
+        sensitivity,
+        profile,
+        twoStage: Boolean(twoStage),
+      });
+      console.log(`  Queued as job ${jobId}`);
+      return res.status(202).json({
+        success: true,
+        matchId,
+        jobId,
+        statusUrl: `/api/clips/jobs/${jobId}`,
+        eventsUrl: `/api/clips/jobs/${jobId}/events`,
+      });
+    }
 
     // Execute Python script
     const { stdout, stderr } = await execFileAsync("python3", [
@@ -162,6 +244,8 @@ router.post("/:matchId/generate", async (req: Request, res: Response) => {
       matchId,
       numClips.toString(),
       sensitivity.toString(),
+      `--profile=${profile}`,
+      ...(twoStage ? ["--two-stage"] : []),
     ]);
 
     if (stderr) {
@@ -187,6 +271,8 @@ router.post("/:matchId/generate", async (req: Request, res: Response) => {
         matchId,
         clipsGenerated: result.clips_generated,
         clips: result.clips,
+        profile: result.profile,
+        archivePending: result.archivePending || false,
         message: `Successfully generated ${result.clips_generated} clips`,
       });
     } catch (parseErr) {
@@ -1,9 +1,17 @@
-const express = require('express');
-const multer  = require('multer');
-const { spawn } = require('child_process');
-const path = require('path');
-const fs = require('fs');
+import express from 'express';
+import multer from 'multer';
+import { spawn } from 'child_process';
+import path from 'path';
+import fs from 'fs';
+import { fileURLToPath } from 'url';
+import {
+  isParserDaemonAvailable,
+  parseWithDaemon,
+  ParserTimeoutError,
+  PARSER_TIMEOUT_MS,
+} from '../services/parserDaemon';
 
+const __dirname = path.dirname(fileURLToPath(import.meta.url));
 const router = express.Router();
 const uploadDir = path.resolve(__dirname, '..', 'dist', 'spa', 'uploads');
 fs.mkdirSync(uploadDir, { recursive: true });
@@ -17,14 +25,10 @@ const storage = multer.diskStorage({
 });
 const upload = multer({ storage, limits: { fileSize: 200 * 1024 * 1024 } }); // 200MB
 
-router.post('/api/upload-demo', upload.single('demo'), (req, res) => {
-  if (!req.file) return res.status(400).json({ success: false, error: 'No file' });
-  const demoPath = path.join(uploadDir, req.file.filename);
-  const parser = path.resolve(__dirname, '..', 'scripts', 'parse_demo.py');
-
+function parseWithPython(parser, demoPath, res) {
   const py = spawn('python3', [parser, demoPath], { stdio: ['ignore', 'pipe', 'pipe'] });
   let stdout='', stderr='';
-  const timer = setTimeout(() => py.kill('SIGKILL'), 120000);
+  const timer = setTimeout(() => py.kill('SIGKILL'), PARSER_TIMEOUT_MS);
 
   py.stdout.on('data', c => stdout += c.toString());
   py.stderr.on('data', c => stderr += c.toString());
@@ -37,6 +41,25 @@ router.post('/api/upload-demo', upload.single('demo'), (req, res) => {
   });
 
   py.on('error', err => { clearTimeout(timer); return res.status(500).json({ success:false, error: String(err) }); });
+}
+
+router.post('/api/upload-demo', upload.single('demo'), async (req, res) => {
+  if (!req.file) return res.status(400).json({ success: false, error: 'No file' });
+  const demoPath = path.join(uploadDir, req.file.filename);
+  const parser = path.resolve(__dirname, '..', 'scripts', 'parse_demo.py');
+
+  // 🔹 Warm parser daemon first, one-shot python3 process as fallback;
+  // both run the basic pipeline, the result shape scripts/parse_demo.py returns
+  if (isParserDaemonAvailable()) {
+    try {
+      return res.json(await parseWithDaemon(demoPath, { pipeline: 'basic' }));
+    } catch (err) {
+      // The daemon is still parsing a timed-out job; don't start a second parse
+      if (err instanceof ParserTimeoutError) return res.status(504).json({ success: false, error: err.message });
+      console.warn('Parser daemon unavailable, spawning python3:', err);
+    }
+  }
+  parseWithPython(parser, demoPath, res);
 });
 
-module.exports = router;
+export default router;
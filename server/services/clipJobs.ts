@@ -0,0 +1,136 @@
+// Clip job store - runs generate_clips.py in the background and keeps each
+// job's metadata plus its NDJSON progress events on disk, so requests can
+// return a job id immediately and clients poll or stream progress.
+
+import * as fs from "fs";
+import * as path from "path";
+import * as crypto from "crypto";
+import { spawn } from "child_process";
+
+export interface ClipJobOptions {
+  matchId: string;
+  demoPath: string;
+  clipsDir: string;
+  numClips: number;
+  sensitivity: number;
+  profile: string;
+  twoStage: boolean;
+}
+
+export interface ClipJob {
+  id: string;
+  matchId: string;
+  status: "running" | "done" | "failed" | "lost";
+  createdAt: string;
+  pid?: number;
+  events: any[];
+  result?: any;
+  error?: string;
+}
+
+export class ClipJobStore {
+  constructor(
+    private jobsDir: string,
+    private script: string,
+  ) {
+    fs.mkdirSync(jobsDir, { recursive: true });
+  }
+
+  private metaPath(id: string) {
+    return path.join(this.jobsDir, `${id}.json`);
+  }
+
+  eventsPath(id: string) {
+    return path.join(this.jobsDir, `${id}.ndjson`);
+  }
+
+  /**
+   * Start generate_clips.py detached and return the new job id
+   */
+  start(options: ClipJobOptions): string {
+    const id = `${Date.now()}_${crypto.randomBytes(4).toString("hex")}`;
+    const child = spawn(
+      "python3",
+      [
+        this.script,
+        options.demoPath,
+        options.clipsDir,
+        options.matchId,
+        options.numClips.toString(),
+        options.sensitivity.toString(),
+        `--profile=${options.profile}`,
+        ...(options.twoStage ? ["--two-stage"] : []),
+        `--progress=${this.eventsPath(id)}`,
+      ],
+      { detached: true, stdio: "ignore" },
+    );
+    child.unref();
+
+    fs.writeFileSync(
+      this.metaPath(id),
+      JSON.stringify({
+        id,
+        matchId: options.matchId,
+        pid: child.pid,
+        createdAt: new Date().toISOString(),
+        options,
+      }),
+    );
+    return id;
+  }
+
+  /**
+   * Events written so far, starting at line `from`
+   */
+  readEvents(id: string, from = 0): any[] {
+    const file = this.eventsPath(id);
+    if (!fs.existsSync(file)) return [];
+    return fs
+      .readFileSync(file, "utf8")
+      .split("\n")
+      .slice(from)
+      .filter((line) => line.trim())
+      .flatMap((line) => {
+        try {
+          return [JSON.parse(line)];
+        } catch {
+          return []; // line still being written
+        }
+      });
+  }
+
+  get(id: string): ClipJob | null {
+    if (!/^[\w-]+$/.test(id) || !fs.existsSync(this.metaPath(id))) {
+      return null;
+    }
+    const meta = JSON.parse(fs.readFileSync(this.metaPath(id), "utf8"));
+    const events = this.readEvents(id);
+    const last = events[events.length - 1];
+
+    let status: ClipJob["status"] = "running";
+    if (last?.event === "done") status = "done";
+    else if (last?.event === "failed") status = "failed";
+    else if (!isAlive(meta.pid)) status = "lost";
+
+    return {
+      id,
+      matchId: meta.matchId,
+      status,
+      createdAt: meta.createdAt,
+      pid: meta.pid,
+      events,
+      result: status === "done" ? last.result : undefined,
+      error: status === "failed" ? last.error : undefined,
+    };
+  }
+}
+
+function isAlive(pid?: number): boolean {
+  if (!pid) return false;
+  try {
+    process.kill(pid, 0);
+    return true;
+  } catch {
+    return false;
+  }
+}
@@ -0,0 +1,99 @@
+// Parser daemon client - talks to `parse_demo_final.py --daemon` over its
+// Unix socket so uploads reuse one warm Python process instead of spawning
+// a fresh interpreter per request.
+
+import * as fs from "fs";
+import * as net from "net";
+
+export const PARSER_SOCKET =
+  process.env.CS2_PARSER_SOCKET || "/var/www/cs2-analysis/run/parser.sock";
+
+let jobCounter = 0;
+
+/**
+ * Backstop for a whole parse. cs2json_budget.py gives each demo an adaptive
+ * budget of at most CS2JSON_MAX_TIMEOUT seconds and kills cs2json itself, so
+ * Node only gives up once the largest possible budget plus a minute for
+ * preflight and post-processing has passed.
+ */
+export const PARSER_TIMEOUT_MS =
+  (Number(process.env.CS2JSON_MAX_TIMEOUT || 900) + 60) * 1000;
+
+export class ParserBusyError extends Error {}
+
+/**
+ * The daemon is still working on the job: do not start a second parse
+ */
+export class ParserTimeoutError extends Error {}
+
+/**
+ * True when a daemon socket exists; callers fall back to execFile otherwise
+ */
+export function isParserDaemonAvailable(): boolean {
+  return fs.existsSync(PARSER_SOCKET);
+}
+
+export interface ParseOptions {
+  timeoutMs?: number;
+  /** Daemon pipeline ("final", "enhanced" or "basic"); the daemon's default if unset */
+  pipeline?: string;
+  onPartial?: (partial: any) => void;
+}
+
+/**
+ * Send one newline-delimited JSON job and resolve with the daemon's reply.
+ * With `onPartial` the job runs in progressive mode: every per-round partial
+ * result line is passed to it before the final reply resolves the promise.
+ */
+export function parseWithDaemon(
+  demoPath: string,
+  { timeoutMs = PARSER_TIMEOUT_MS, pipeline, onPartial }: ParseOptions = {},
+): Promise<any> {
+  return new Promise((resolve, reject) => {
+    const id = `${process.pid}-${++jobCounter}`;
+    const socket = net.createConnection(PARSER_SOCKET);
+    let buffer = "";
+
+    socket.setTimeout(timeoutMs, () => {
+      socket.destroy(
+        new ParserTimeoutError(`Parser daemon timeout after ${timeoutMs}ms`),
+      );
+    });
+
+    socket.on("connect", () => {
+      const request: Record<string, unknown> = { id, demo: demoPath };
+      if (pipeline) request.pipeline = pipeline;
+      if (onPartial) request.progressive = true;
+      socket.write(JSON.stringify(request) + "\n");
+    });
+
+    socket.on("data", (chunk) => {
+      buffer += chunk.toString();
+      let newline: number;
+      while ((newline = buffer.indexOf("\n")) !== -1) {
+        const line = buffer.slice(0, newline);
+        buffer = buffer.slice(newline + 1);
+
+        let reply: any;
+        try {
+          reply = JSON.parse(line);
+        } catch (err) {
+          socket.end();
+          return reject(err);
+        }
+        if (reply.partial) {
+          onPartial?.(reply);
+          continue;
+        }
+
+        socket.end();
+        if (reply.busy) {
+          return reject(new ParserBusyError(reply.error || "Parser busy"));
+        }
+        return resolve(reply);
+      }
+    });
+
+    socket.on("error", reject);
+  });
+}